@@ -0,0 +1,187 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now: Optional[float] = None) -> float:
+        """Take one token; returns 0 on success, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (1 - self.tokens) / self.rate
+
+    def idle(self, now: float) -> bool:
+        """True once the bucket has refilled, so dropping it loses nothing."""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+class EndpointLimit:
+    """Admission policy for one class of expensive endpoints."""
+
+    def __init__(self, rate_per_minute: float, burst: int, priority: int):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        # Lower runs first when work is queued (interactive before batch)
+        self.priority = priority
+
+class AdmissionController:
+    """Admission control for the CPU-heavy endpoints.
+
+    Each request is charged against a per-user token bucket for its endpoint
+    class, then takes one of ``max_concurrency`` global slots. Requests beyond
+    that wait in a bounded priority queue; once it is full, lower-priority
+    waiters are shed first and the rest get 429 with Retry-After. Admitted work
+    runs on a worker pool sized to the slots (see ``offload``), so cheap
+    endpoints keep the event loop to themselves.
+    """
+
+    def __init__(self, limits: Dict[str, EndpointLimit], max_concurrency: int = 2,
+                 max_queue: int = 32, queue_timeout: float = 10.0, max_buckets: int = 10000):
+        self.limits = limits
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_buckets = max_buckets
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future, str]] = []
+        self._sequence = itertools.count()
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._service_time = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="heavy")
+        self.counters: Dict[str, Dict[str, int]] = {
+            name: {"admitted": 0, "rate_limited": 0, "shed": 0} for name in limits
+        }
+
+    def _bucket(self, endpoint: str, user_id: str) -> TokenBucket:
+        key = (endpoint, user_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                now = time.monotonic()
+                self._buckets = {k: b for k, b in self._buckets.items() if not b.idle(now)}
+            limit = self.limits[endpoint]
+            bucket = self._buckets[key] = TokenBucket(limit.rate_per_minute / 60.0, limit.burst)
+        return bucket
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queued request would start, for Retry-After."""
+        pending = len(self._waiters) + 1
+        return max(1, math.ceil(pending * (self._service_time or 1.0) / self.max_concurrency))
+
+    def _rejection(self, endpoint: str, reason: str, retry_after: float) -> HTTPException:
+        self.counters[endpoint]["rate_limited" if reason == "rate" else "shed"] += 1
+        detail = "Rate limit exceeded" if reason == "rate" else "Server busy, please retry"
+        return HTTPException(status_code=429, detail=detail,
+                             headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    async def acquire(self, endpoint: str, user_id: str):
+        """Charge the user's bucket and wait for a slot; raises 429 when refused."""
+        limit = self.limits[endpoint]
+        wait = self._bucket(endpoint, user_id).take()
+        if wait > 0:
+            raise self._rejection(endpoint, "rate", wait if math.isfinite(wait) else 60)
+
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.counters[endpoint]["admitted"] += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            # Queue full: make room by shedding the lowest-priority waiter, if it ranks below us
+            worst = max(self._waiters, default=None)
+            if worst is None or worst[0] <= limit.priority:
+                raise self._rejection(endpoint, "queue", self.retry_after())
+            self._waiters.remove(worst)
+            heapq.heapify(self._waiters)
+            worst[2].set_exception(self._rejection(worst[3], "queue", self.retry_after()))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (limit.priority, next(self._sequence), future, endpoint)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Timed out, or the client went away while queued
+            granted = _granted(future)
+            self._discard(entry)
+            if granted:
+                # The slot arrived just as we gave up; hand it on
+                self.release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._rejection(endpoint, "queue", self.retry_after())
+        self.counters[endpoint]["admitted"] += 1
+
+    def _discard(self, entry):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        if not entry[2].done():
+            entry[2].cancel()
+
+    def release(self):
+        """Free a slot, handing it straight to the best queued request."""
+        while self._waiters:
+            _, _, future, _ = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, endpoint: str, user_id: str):
+        """Hold a heavy-work slot for the duration of the block."""
+        await self.acquire(endpoint, user_id)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            # Smoothed service time feeds the Retry-After estimate
+            self._service_time = elapsed if not self._service_time else 0.8 * self._service_time + 0.2 * elapsed
+            self.release()
+
+    async def offload(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run a CPU-bound service call on the worker pool instead of the event loop.
+
+        Service methods are ``async`` but never await, so coroutine functions are
+        driven to completion on the worker thread.
+        """
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, context.run, _call, func, args, kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "endpoints": {name: dict(counts) for name, counts in self.counters.items()},
+        }
+
+def _granted(future: asyncio.Future) -> bool:
+    return future.done() and not future.cancelled() and future.exception() is None
+
+def _call(func: Callable, args, kwargs):
+    if asyncio.iscoroutinefunction(func):
+        return asyncio.run(func(*args, **kwargs))
+    return func(*args, **kwargs)
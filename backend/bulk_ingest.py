@@ -0,0 +1,301 @@
+"""Offline bulk import of transcripts.
+
+Usage (from backend/, like the server, since storage paths are relative):
+
+    python bulk_ingest.py archive/ --user-email teacher@example.com
+    python bulk_ingest.py course.jsonl --user-id 64f0c0ffee --workers 8
+
+A directory contributes every ``.txt`` (title = file name) and ``.json``
+(``{"title", "transcript"}``) file; a ``.jsonl`` file contributes one such
+object per line. Summaries and MinHash signatures are computed on a process
+pool, content is written with unordered ``insert_many`` batches, and the
+vector index, keyword statistics and search index are built once at the end instead of
+once per document. Progress is checkpointed after every batch, so an
+interrupted import picks up where it stopped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from responses import content_fingerprint
+
+# Set in each pool process by _init_worker
+_nlp_service = None
+_dedup_service = None
+
+def _init_worker(num_perm: int, bands: int, shingle_size: int, threshold: float):
+    global _nlp_service, _dedup_service
+    from services.dedup_service import DedupService
+    from services.nlp_service import NLPService
+
+    _nlp_service = NLPService()
+    _dedup_service = DedupService(num_perm=num_perm, bands=bands, shingle_size=shingle_size, threshold=threshold)
+
+def _summarize(transcript: str) -> Tuple[str, Optional[bytes]]:
+    """Summary and encoded MinHash signature for one transcript (runs in a pool process)."""
+    summary = asyncio.run(_nlp_service.generate_summary(transcript))
+    signature = _dedup_service.signature(transcript)
+    return summary, _dedup_service.encode(signature) if signature is not None else None
+
+def read_records(source: str) -> Iterator[Dict[str, Any]]:
+    """Yield {"key", "title", "transcript", "source_url"} for each transcript in a directory or JSONL file."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                stem, extension = os.path.splitext(name)
+                try:
+                    if extension == ".txt":
+                        with open(path, encoding="utf-8") as f:
+                            record = {"title": stem, "transcript": f.read()}
+                    elif extension == ".json":
+                        with open(path, encoding="utf-8") as f:
+                            record = json.load(f)
+                        record.setdefault("title", stem)
+                    else:
+                        continue
+                except (OSError, ValueError) as e:
+                    print(f"Error reading {path}: {e}")
+                    continue
+                yield _record(os.path.relpath(path, source), record, path)
+    else:
+        with open(source, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    print(f"Error reading {source}:{line_number}: {e}")
+                    continue
+                key = str(record.get("id") or f"line-{line_number}")
+                yield _record(key, record, record.get("source_url") or source)
+
+def _record(key: str, record: Dict[str, Any], source_url: str) -> Dict[str, Any]:
+    return {
+        "key": key,
+        "title": str(record.get("title") or key),
+        "transcript": str(record.get("transcript") or ""),
+        "source_url": source_url,
+    }
+
+def load_checkpoint(path: str, source: str, user_id: str) -> Dict[str, Any]:
+    """The saved progress for this source and user, or a fresh one."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") == os.path.abspath(source) and checkpoint.get("user_id") == user_id:
+            return checkpoint
+        print(f"Ignoring checkpoint {path}: it belongs to another import")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Error loading checkpoint {path}: {e}")
+    return {"source": os.path.abspath(source), "user_id": user_id, "done": {}, "indexed": 0}
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def _batches(records: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def _insert_batch(db, user_id: str, batch: List[Dict[str, Any]],
+                        results: List[Tuple[str, Optional[bytes]]]) -> Dict[str, str]:
+    """Insert one summarized batch; returns {record key: content_id} for the documents written."""
+    from pymongo.errors import BulkWriteError
+
+    # Documents written just before a crash (after the insert, before the checkpoint) aren't repeated
+    keys = [record["key"] for record in batch]
+    written = {doc["import_key"]: str(doc["_id"]) async for doc in db.content.find(
+        {"user_id": user_id, "import_key": {"$in": keys}}, {"import_key": 1}
+    )}
+
+    documents = []
+    for record, (summary, minhash) in zip(batch, results):
+        if record["key"] in written:
+            continue
+        content_doc = {
+            "user_id": user_id,
+            "title": record["title"],
+            "content_type": "import",
+            "source_url": record["source_url"],
+            "transcript": record["transcript"],
+            "summary": summary,
+            "created_at": datetime.utcnow(),
+            "language": "en",
+            "import_key": record["key"],
+        }
+        content_doc["content_hash"] = content_fingerprint(content_doc)
+        if minhash is not None:
+            content_doc["minhash"] = minhash
+        documents.append(content_doc)
+    if not documents:
+        return written
+
+    failed = set()
+    try:
+        # Unordered: one bad document doesn't stop the rest of the batch
+        await db.content.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed.add(error["index"])
+            print(f"Error inserting {documents[error['index']]['import_key']}: {error.get('errmsg')}")
+    for index, document in enumerate(documents):
+        if index not in failed and "_id" in document:
+            written[document["import_key"]] = str(document["_id"])
+    return written
+
+async def _load_documents(db, user_id: str, content_ids: List[str], batch_size: int) -> List[Dict[str, Any]]:
+    """Title, transcript and summary of imported content, fetched in batches."""
+    from config import id_values
+
+    documents = []
+    for start in range(0, len(content_ids), batch_size):
+        chunk = content_ids[start:start + batch_size]
+        async for doc in db.content.find({"_id": {"$in": id_values(chunk)}, "user_id": user_id},
+                                         {"title": 1, "transcript": 1, "summary": 1}):
+            documents.append(doc)
+    return documents
+
+async def run_import(source: str, user_id: str, db, vector_service, term_stats, search_index=None,
+                     workers: Optional[int] = None, batch_size: int = 1000,
+                     checkpoint_path: Optional[str] = None,
+                     dedup_settings: Tuple[int, int, int, float] = (128, 16, 3, 0.8)) -> Dict[str, Any]:
+    """Import every transcript under ``source`` for one user; returns counts and throughput."""
+    checkpoint_path = checkpoint_path or os.path.abspath(source).rstrip(os.sep) + ".import-checkpoint.json"
+    checkpoint = load_checkpoint(checkpoint_path, source, user_id)
+    done: Dict[str, str] = checkpoint["done"]
+    skipped = len(done)
+
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    inserted = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=dedup_settings) as pool:
+        pending = (record for record in read_records(source)
+                   if record["key"] not in done and record["transcript"].strip())
+        for batch in _batches(pending, batch_size):
+            summaries = await asyncio.gather(*(
+                loop.run_in_executor(pool, _summarize, record["transcript"]) for record in batch
+            ))
+            written = await _insert_batch(db, user_id, batch, summaries)
+            done.update(written)
+            inserted += len(written)
+            save_checkpoint(checkpoint_path, checkpoint)
+            elapsed = time.perf_counter() - started
+            print(f"{len(done)} documents imported ({inserted / elapsed:.1f} docs/sec)", flush=True)
+    summarized_at = time.perf_counter()
+
+    # One index fit and one snapshot for the whole import, including earlier interrupted runs
+    indexed = 0
+    if checkpoint.get("indexed") != len(done):
+        documents = await _load_documents(db, user_id, list(done.values()), batch_size)
+        vector_service.store_many(
+            [(str(doc["_id"]), doc["transcript"], doc["summary"]) for doc in documents], user_id=user_id
+        )
+        term_stats.add_documents(user_id, ((str(doc["_id"]), doc["transcript"]) for doc in documents))
+        if search_index is not None:
+            search_index.add_documents(user_id, ((str(doc["_id"]), doc["title"], doc["transcript"]) for doc in documents))
+        indexed = len(documents)
+        if indexed < len(done):
+            # Leave the checkpoint unindexed so the next run loads and indexes again
+            print(f"Error indexing import: loaded {indexed} of {len(done)} imported documents")
+        else:
+            checkpoint["indexed"] = len(done)
+            save_checkpoint(checkpoint_path, checkpoint)
+    finished = time.perf_counter()
+
+    summarize_seconds = summarized_at - started
+    index_seconds = finished - summarized_at
+    total_seconds = finished - started
+    return {
+        "inserted": inserted,
+        "skipped": skipped,
+        "indexed": indexed,
+        "summarize_seconds": round(summarize_seconds, 3),
+        "index_seconds": round(index_seconds, 3),
+        "total_seconds": round(total_seconds, 3),
+        "summarize_docs_per_sec": round(inserted / summarize_seconds, 2) if summarize_seconds else 0.0,
+        "index_docs_per_sec": round(indexed / index_seconds, 2) if index_seconds else 0.0,
+        "docs_per_sec": round(inserted / total_seconds, 2) if total_seconds else 0.0,
+        "checkpoint": checkpoint_path,
+    }
+
+async def _main(args) -> int:
+    from config import (
+        get_database, close_database, QA_CACHE_MAX_ENTRIES, QA_CACHE_TTL_SECONDS, QA_DENSE_ENCODER,
+        QA_RETRIEVAL_BUDGET_MS, QA_INDEX_COMPRESSION, QA_PQ_SUBSPACES, QA_SPARSE_MAX_TERMS,
+        QA_RESCORE_CANDIDATES, TERM_STATS_PATH, SEARCH_INDEX_PATH, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE,
+        DEDUP_THRESHOLD
+    )
+    from services.search_index import SearchIndex
+    from services.term_stats import TermStatistics
+    from services.vector_service import VectorService
+
+    db = get_database()
+    user_id = args.user_id
+    if user_id is None:
+        user = await db.users.find_one({"email": args.user_email})
+        if user is None:
+            print(f"No user with email {args.user_email}")
+            return 1
+        user_id = str(user["_id"])
+
+    vector_service = VectorService(
+        cache_max_entries=QA_CACHE_MAX_ENTRIES,
+        cache_ttl_seconds=QA_CACHE_TTL_SECONDS,
+        dense_encoder=QA_DENSE_ENCODER,
+        retrieval_budget_ms=QA_RETRIEVAL_BUDGET_MS,
+        compression=QA_INDEX_COMPRESSION,
+        pq_subspaces=QA_PQ_SUBSPACES,
+        sparse_max_terms=QA_SPARSE_MAX_TERMS,
+        rescore_candidates=QA_RESCORE_CANDIDATES
+    )
+    try:
+        report = await run_import(
+            args.source, user_id, db, vector_service, TermStatistics(TERM_STATS_PATH), SearchIndex(SEARCH_INDEX_PATH),
+            workers=args.workers, batch_size=args.batch_size, checkpoint_path=args.checkpoint,
+            dedup_settings=(DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE, DEDUP_THRESHOLD)
+        )
+    finally:
+        await close_database()
+
+    print(f"Imported {report['inserted']} documents ({report['skipped']} already done) "
+          f"in {report['total_seconds']:.1f}s: {report['docs_per_sec']:.1f} docs/sec overall")
+    print(f"  summarize + insert: {report['summarize_docs_per_sec']:.1f} docs/sec")
+    print(f"  index fit ({report['indexed']} documents): {report['index_docs_per_sec']:.1f} docs/sec")
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import transcripts into SmartScribe")
+    parser.add_argument("source", help="directory of .txt/.json transcripts, or a .jsonl file")
+    owner = parser.add_mutually_exclusive_group(required=True)
+    owner.add_argument("--user-id", help="id of the user who will own the content")
+    owner.add_argument("--user-email", help="email of the user who will own the content")
+    parser.add_argument("--workers", type=int, default=None, help="summarizer processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per insert_many and checkpoint")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file (default: next to the source)")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.source):
+        parser.error(f"{args.source} does not exist")
+    return asyncio.run(_main(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import gzip
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Content types worth compressing (prefix match)
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "application/xml",
+    "image/svg+xml", "application/manifest+json",
+)
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Supported encodings the client accepts, best first (honouring q=0)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    encodings = []
+    if brotli is not None and accepted.get("br", 0) > 0:
+        encodings.append("br")
+    if accepted.get("gzip", 0) > 0:
+        encodings.append("gzip")
+    return encodings
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header."""
+    encodings = accepted_encodings(accept_encoding)
+    return encodings[0] if encodings else None
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4 if level is None else level)
+    return gzip.compress(body, compresslevel=6 if level is None else level)
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=4)
+            self._compress = self._compressor.process
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress = self._compressor.compress
+            self._finish = self._compressor.flush
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compress(chunk)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with brotli or gzip above a size threshold.
+
+    Responses that already carry a Content-Encoding (e.g. precompressed static
+    files) or a non-text content type pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                if _should_skip(message["status"], headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None and start_message is not None:
+                if not more_body:
+                    # Whole body in one message: compress it only if it's worth it
+                    if len(body) < self.minimum_size:
+                        await send(start_message)
+                        await send(message)
+                    else:
+                        compressed = compress(body, encoding)
+                        await send(_with_encoding(start_message, encoding, len(compressed)))
+                        await send({"type": "http.response.body", "body": compressed})
+                    start_message = None
+                    return
+
+                # Streaming response: compress chunk by chunk
+                compressor = _StreamCompressor(encoding)
+                await send(_with_encoding(start_message, encoding, None))
+                start_message = None
+
+            if compressor is not None:
+                chunk = compressor.compress(body)
+                if not more_body:
+                    chunk += compressor.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+def _should_skip(status: int, headers: List[Tuple[bytes, bytes]]) -> bool:
+    if status < 200 or status in (204, 206, 304):
+        return True
+    if _header(headers, b"content-encoding") is not None:
+        return True
+    content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+    return not content_type.startswith(COMPRESSIBLE_TYPES)
+
+def _with_encoding(start_message, encoding: str, content_length: Optional[int]):
+    headers = []
+    for key, value in start_message.get("headers", []):
+        lower = key.lower()
+        if lower == b"content-length":
+            continue
+        if lower == b"etag" and not value.startswith(b"W/"):
+            # The compressed bytes differ from the identity representation
+            value = b"W/" + value
+        headers.append((key, value))
+
+    headers.append((b"content-encoding", encoding.encode("latin-1")))
+    vary = _header(headers, b"vary")
+    if vary is None:
+        headers.append((b"vary", b"Accept-Encoding"))
+    elif b"accept-encoding" not in vary.lower():
+        headers = [(k, v + b", Accept-Encoding" if k.lower() == b"vary" else v) for k, v in headers]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode("latin-1")))
+    return {**start_message, "headers": headers}
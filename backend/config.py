@@ -1,10 +1,69 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from instrumentation import InstrumentedDatabase
 
 # MongoDB configuration
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "smartscribe")
 
+# Q&A answer cache
+QA_CACHE_MAX_ENTRIES = int(os.getenv("QA_CACHE_MAX_ENTRIES", "1024"))
+QA_CACHE_TTL_SECONDS = float(os.getenv("QA_CACHE_TTL_SECONDS", "300"))
+
+# Q&A retrieval: dense encoder ("lsa", "sentence-transformers" or "none") and latency budget
+QA_DENSE_ENCODER = os.getenv("QA_DENSE_ENCODER", "lsa")
+QA_RETRIEVAL_BUDGET_MS = float(os.getenv("QA_RETRIEVAL_BUDGET_MS", "100"))
+
+# Compressed Q&A index: "int8" or "pq" dense codes (PQ_SUBSPACES bytes per vector) and
+# float16 BM25 postings pruned to SPARSE_MAX_TERMS per document (0 keeps all); the top
+# RESCORE_CANDIDATES of each first pass are re-scored at full precision
+QA_INDEX_COMPRESSION = os.getenv("QA_INDEX_COMPRESSION", "none")
+QA_PQ_SUBSPACES = int(os.getenv("QA_PQ_SUBSPACES", "16"))
+QA_SPARSE_MAX_TERMS = int(os.getenv("QA_SPARSE_MAX_TERMS", "0"))
+QA_RESCORE_CANDIDATES = int(os.getenv("QA_RESCORE_CANDIDATES", "100"))
+
+# Per-user document frequencies for keyword extraction
+TERM_STATS_PATH = os.getenv("TERM_STATS_PATH", "term_stats")
+
+# Full-text search: per-user positional indexes and the largest page size
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "search_index")
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "50"))
+
+# Near-duplicate uploads: MinHash permutations, LSH bands, word shingle length
+# and the estimated Jaccard similarity at which an upload links to existing content
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+
+# Responses at least this large (bytes) are compressed with brotli/gzip
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Quiz grading: cached answer keys and write batching window for single submissions
+QUIZ_ANSWER_KEY_CACHE_SIZE = int(os.getenv("QUIZ_ANSWER_KEY_CACHE_SIZE", "1024"))
+QUIZ_SUBMIT_BATCH_MS = float(os.getenv("QUIZ_SUBMIT_BATCH_MS", "5"))
+# Answer sheets per bulk grading request (bulk grading doesn't go through admission control)
+QUIZ_BULK_MAX_SUBMISSIONS = int(os.getenv("QUIZ_BULK_MAX_SUBMISSIONS", "1000"))
+
+# Admission control for the heavy endpoints: global slots, queue bound and wait,
+# and per-user rate limits (requests per minute, burst) for each endpoint class
+HEAVY_MAX_CONCURRENCY = int(os.getenv("HEAVY_MAX_CONCURRENCY", "2"))
+HEAVY_MAX_QUEUE = int(os.getenv("HEAVY_MAX_QUEUE", "32"))
+HEAVY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("HEAVY_QUEUE_TIMEOUT_SECONDS", "10"))
+UPLOAD_RATE_PER_MINUTE = float(os.getenv("UPLOAD_RATE_PER_MINUTE", "10"))
+UPLOAD_BURST = int(os.getenv("UPLOAD_BURST", "5"))
+QUIZ_GENERATE_RATE_PER_MINUTE = float(os.getenv("QUIZ_GENERATE_RATE_PER_MINUTE", "20"))
+QUIZ_GENERATE_BURST = int(os.getenv("QUIZ_GENERATE_BURST", "5"))
+QA_ASK_RATE_PER_MINUTE = float(os.getenv("QA_ASK_RATE_PER_MINUTE", "60"))
+QA_ASK_BURST = int(os.getenv("QA_ASK_BURST", "20"))
+
+# Startup: warm the index in the background, and whether to fetch missing NLTK data
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+NLTK_AUTO_DOWNLOAD = os.getenv("NLTK_AUTO_DOWNLOAD", "false").lower() in ("1", "true", "yes")
+
+# Uvicorn worker processes; workers share the vector index through on-disk snapshots
+WORKERS = int(os.getenv("WORKERS", "1"))
+
 # Global database connection
 _client = None
 _database = None
@@ -13,9 +72,15 @@ def get_database():
     global _client, _database
     if _database is None:
         _client = AsyncIOMotorClient(MONGODB_URL)
-        _database = _client[DATABASE_NAME]
+        _database = InstrumentedDatabase(_client[DATABASE_NAME])
     return _database
 
+def id_values(ids):
+    """``_id`` values to match for string ids: the ObjectId the driver assigned, and the string itself."""
+    from bson import ObjectId
+
+    return [ObjectId(value) for value in ids if ObjectId.is_valid(value)] + list(ids)
+
 async def close_database():
     global _client
     if _client:
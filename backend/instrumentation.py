@@ -0,0 +1,264 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Histogram buckets in seconds (Prometheus defaults plus a 30s tail for uploads)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Request header that asks for a per-request stage breakdown
+TRACE_HEADER = os.getenv("TRACE_HEADER", "x-trace-stages").lower()
+TRACE_ALWAYS = os.getenv("TRACE_STAGES_ALWAYS", "").lower() in ("1", "true", "yes")
+
+# Stages recorded during the current request, as (name, seconds)
+_current_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("stage_trace", default=None)
+
+class Histogram:
+    """Cumulative histogram in the Prometheus exposition model."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+class MetricsRegistry:
+    """Process-local registry of labelled histograms and gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._gauge_sources: List[Callable[[], Dict[str, float]]] = []
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if help_text:
+                self._help.setdefault(name, help_text)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def register_gauges(self, source: Callable[[], Dict[str, float]]):
+        """Register a callable returning {metric_name: value} evaluated at scrape time."""
+        self._gauge_sources.append(source)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_float(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for source in self._gauge_sources:
+            try:
+                gauges = source()
+            except Exception as e:
+                print(f"Error collecting gauges: {e}")
+                continue
+            for name, value in gauges.items():
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+registry = MetricsRegistry()
+
+STAGE_METRIC = "smartscribe_stage_duration_seconds"
+REQUEST_METRIC = "smartscribe_http_request_duration_seconds"
+
+def record_stage(name: str, seconds: float):
+    """Record a stage timing in the histogram and the active request trace."""
+    registry.observe(STAGE_METRIC, seconds, "Time spent in a processing stage.", stage=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.append((name, seconds))
+
+@contextmanager
+def stage(name: str):
+    """Time a block of code as a named stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+def timed(name: str):
+    """Decorator that times a sync or async function as a named stage."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record_stage(name, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_stage(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class InstrumentationMiddleware:
+    """ASGI middleware timing every HTTP request and optionally returning its stage breakdown.
+
+    Send the trace header (default ``X-Trace-Stages: 1``) to get a ``Server-Timing``
+    response header listing each stage recorded while handling the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_requested = TRACE_ALWAYS or any(
+            key.decode("latin-1").lower() == TRACE_HEADER for key, _ in scope.get("headers", [])
+        )
+        trace: List[Tuple[str, float]] = []
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trace_requested:
+                    total = time.perf_counter() - start
+                    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in trace]
+                    entries.append(f"total;dur={total * 1000:.2f}")
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            route = scope.get("route")
+            registry.observe(
+                REQUEST_METRIC,
+                time.perf_counter() - start,
+                "HTTP request latency.",
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
+
+class _InstrumentedCursor:
+    """Async cursor wrapper timing the full iteration as one DB stage."""
+
+    def __init__(self, cursor, stage_name: str):
+        self._cursor = cursor
+        self._stage_name = stage_name
+        self._elapsed = 0.0
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        start = time.perf_counter()
+        try:
+            return await self._cursor.__anext__()
+        except StopAsyncIteration:
+            if not self._done:
+                self._done = True
+                record_stage(self._stage_name, self._elapsed + time.perf_counter() - start)
+            raise
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    async def to_list(self, *args, **kwargs):
+        with stage(self._stage_name):
+            return await self._cursor.to_list(*args, **kwargs)
+
+class _InstrumentedCollection:
+    """Collection wrapper timing awaited operations as ``db.<collection>.<op>`` stages."""
+
+    _TIMED = {
+        "find_one", "insert_one", "insert_many", "update_one", "update_many",
+        "delete_one", "delete_many", "count_documents", "bulk_write", "find_one_and_update",
+    }
+
+    def __init__(self, collection, name: str):
+        self._collection = collection
+        self._name = name
+
+    def __getattr__(self, attr):
+        value = getattr(self._collection, attr)
+        if attr == "find":
+            def find(*args, **kwargs):
+                return _InstrumentedCursor(value(*args, **kwargs), f"db.{self._name}.find")
+            return find
+        if attr in self._TIMED:
+            return timed(f"db.{self._name}.{attr}")(_as_coroutine(value))
+        return value
+
+def _as_coroutine(method):
+    async def call(*args, **kwargs):
+        return await method(*args, **kwargs)
+    return call
+
+class InstrumentedDatabase:
+    """Database wrapper returning instrumented collections."""
+
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, name):
+        return _InstrumentedCollection(getattr(self._database, name), name)
+
+    def __getitem__(self, name):
+        return _InstrumentedCollection(self._database[name], name)
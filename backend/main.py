@@ -1,8 +1,9 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import PlainTextResponse, JSONResponse
 import uvicorn
+import asyncio
 import os
 from typing import Optional, List
 from datetime import datetime
@@ -10,12 +11,35 @@ from datetime import datetime
 from models import *
 from auth import get_current_user, create_access_token, verify_password, get_password_hash
 from services.nlp_service import NLPService
+from services.term_stats import TermStatistics
+from services.dedup_service import DedupService
 from services.translation_service import TranslationService
 from services.quiz_service import QuizService
 from services.vector_service import VectorService
-from config import get_database
+from services.search_index import SearchIndex, build_snippets, match_offsets
+from services.grading_service import GradingService, InsertBatcher
+from services.text_utils import check_nltk_data
+from config import (
+    get_database, id_values, QA_CACHE_MAX_ENTRIES, QA_CACHE_TTL_SECONDS, QA_DENSE_ENCODER,
+    QA_RETRIEVAL_BUDGET_MS, QA_INDEX_COMPRESSION, QA_PQ_SUBSPACES, QA_SPARSE_MAX_TERMS,
+    QA_RESCORE_CANDIDATES, WARM_ON_STARTUP, NLTK_AUTO_DOWNLOAD, WORKERS,
+    QUIZ_ANSWER_KEY_CACHE_SIZE, QUIZ_SUBMIT_BATCH_MS, COMPRESSION_MIN_SIZE,
+    HEAVY_MAX_CONCURRENCY, HEAVY_MAX_QUEUE, HEAVY_QUEUE_TIMEOUT_SECONDS,
+    UPLOAD_RATE_PER_MINUTE, UPLOAD_BURST, QUIZ_GENERATE_RATE_PER_MINUTE, QUIZ_GENERATE_BURST,
+    QA_ASK_RATE_PER_MINUTE, QA_ASK_BURST, TERM_STATS_PATH, SEARCH_INDEX_PATH, SEARCH_MAX_PAGE_SIZE,
+    DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE, DEDUP_THRESHOLD
+)
+from instrumentation import InstrumentationMiddleware, registry, stage
+from admission import AdmissionController, EndpointLimit
+from compression import CompressionMiddleware
+from responses import FastJSONResponse, content_fingerprint, etag_matches
+from static_files import CachedFile, PrecompressedStaticFiles
 
-app = FastAPI(title="SmartScribe Pro", description="AI-Powered Learning Platform")
+app = FastAPI(
+    title="SmartScribe Pro",
+    description="AI-Powered Learning Platform",
+    default_response_class=FastJSONResponse
+)
 
 # CORS middleware
 app.add_middleware(
@@ -24,34 +48,134 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-# Initialize services
-nlp_service = NLPService()
+# Compress large responses (transcripts, content lists) with brotli or gzip
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Request latency histograms and the optional Server-Timing stage breakdown
+app.add_middleware(InstrumentationMiddleware)
+
+# Initialize services (cheap: heavy libraries and the stored index load on first use)
+term_stats = TermStatistics(TERM_STATS_PATH)
+search_index = SearchIndex(SEARCH_INDEX_PATH)
+nlp_service = NLPService(term_stats=term_stats)
 translation_service = TranslationService()
 quiz_service = QuizService()
-vector_service = VectorService()
+vector_service = VectorService(
+    cache_max_entries=QA_CACHE_MAX_ENTRIES,
+    cache_ttl_seconds=QA_CACHE_TTL_SECONDS,
+    dense_encoder=QA_DENSE_ENCODER,
+    retrieval_budget_ms=QA_RETRIEVAL_BUDGET_MS,
+    compression=QA_INDEX_COMPRESSION,
+    pq_subspaces=QA_PQ_SUBSPACES,
+    sparse_max_terms=QA_SPARSE_MAX_TERMS,
+    rescore_candidates=QA_RESCORE_CANDIDATES
+)
+grading_service = GradingService(max_keys=QUIZ_ANSWER_KEY_CACHE_SIZE)
+dedup_service = DedupService(
+    num_perm=DEDUP_NUM_PERM,
+    bands=DEDUP_BANDS,
+    shingle_size=DEDUP_SHINGLE_SIZE,
+    threshold=DEDUP_THRESHOLD
+)
+submission_batcher = InsertBatcher(
+    lambda: get_database().quiz_submissions,
+    max_delay=QUIZ_SUBMIT_BATCH_MS / 1000
+)
 
-# Mount static files for React app
-app.mount("/src", StaticFiles(directory="src"), name="src")
-app.mount("/attached_assets", StaticFiles(directory="attached_assets"), name="attached_assets")
+# Submissions per insert_many call for bulk grading
+BULK_INSERT_BATCH_SIZE = 1000
+
+# Uploads, quiz generation and Q&A share a few CPU slots; interactive Q&A is served first
+admission = AdmissionController(
+    {
+        "qa_ask": EndpointLimit(QA_ASK_RATE_PER_MINUTE, QA_ASK_BURST, priority=0),
+        "quiz_generate": EndpointLimit(QUIZ_GENERATE_RATE_PER_MINUTE, QUIZ_GENERATE_BURST, priority=1),
+        "upload": EndpointLimit(UPLOAD_RATE_PER_MINUTE, UPLOAD_BURST, priority=2),
+    },
+    max_concurrency=HEAVY_MAX_CONCURRENCY,
+    max_queue=HEAVY_MAX_QUEUE,
+    queue_timeout=HEAVY_QUEUE_TIMEOUT_SECONDS
+)
+
+# Mount static files for React app (precompressed variants, long-lived caching for hashed build output;
+# attached assets keep their names across edits, so they always revalidate)
+app.mount("/src", PrecompressedStaticFiles(directory="src", hashed_names=True), name="src")
+app.mount("/attached_assets", PrecompressedStaticFiles(directory="attached_assets"), name="attached_assets")
+
+# The SPA shell, served from memory
+spa_index = CachedFile("index.html")
 
 # Serve uploaded files
 if os.path.exists("uploads"):
     app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
-@app.get("/")
-async def read_root():
-    return FileResponse("index.html")
+def _cache_gauges():
+    stats = vector_service.cache.stats()
+    return {
+        "smartscribe_qa_cache_entries": stats["entries"],
+        "smartscribe_qa_cache_hits_total": stats["hits"],
+        "smartscribe_qa_cache_misses_total": stats["misses"],
+        "smartscribe_qa_cache_hit_rate": stats["hit_rate"],
+        "smartscribe_vector_documents": len(vector_service.documents),
+        "smartscribe_quiz_answer_keys_cached": grading_service.stats()["cached_keys"],
+    }
 
-@app.get("/{full_path:path}")
-async def serve_spa(full_path: str):
-    # Don't serve SPA for API routes or static files
-    if full_path.startswith("api/") or full_path.startswith("src/") or full_path.startswith("uploads/") or full_path.startswith("attached_assets/"):
-        raise HTTPException(status_code=404, detail="Not found")
-    
-    # For any other route, serve the React SPA
-    return FileResponse("index.html")
+def _admission_gauges():
+    stats = admission.stats()
+    gauges = {
+        "smartscribe_admission_in_flight": stats["in_flight"],
+        "smartscribe_admission_queued": stats["queued"],
+    }
+    for endpoint, counts in stats["endpoints"].items():
+        for outcome, count in counts.items():
+            gauges[f"smartscribe_admission_{endpoint}_{outcome}_total"] = count
+    return gauges
+
+registry.register_gauges(_cache_gauges)
+registry.register_gauges(_admission_gauges)
+
+# Background warm-up so the first request doesn't pay for imports and index load
+_warm_up_state = {"nltk_data": {}, "error": None}
+_warm_up_tasks = set()
+
+async def _warm_up():
+    try:
+        _warm_up_state["nltk_data"] = await asyncio.to_thread(check_nltk_data, NLTK_AUTO_DOWNLOAD)
+        await asyncio.to_thread(vector_service.ensure_loaded)
+    except Exception as e:
+        _warm_up_state["error"] = str(e)
+        print(f"Warm-up failed: {e}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    if WARM_ON_STARTUP:
+        task = asyncio.create_task(_warm_up())
+        _warm_up_tasks.add(task)
+        task.add_done_callback(_warm_up_tasks.discard)
+
+# Health endpoints: liveness means accepting requests, readiness means the index is warm
+@app.get("/api/health/live")
+async def liveness():
+    return {"status": "ok"}
+
+@app.get("/api/health/ready")
+async def readiness():
+    ready = vector_service.loaded
+    body = {
+        "status": "ready" if ready else "warming",
+        "index_warm": ready,
+        "documents": len(vector_service.documents),
+        "nltk_data": _warm_up_state["nltk_data"],
+        "error": _warm_up_state["error"],
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # Authentication endpoints
 @app.post("/api/auth/register", response_model=UserResponse)
@@ -123,12 +247,38 @@ async def upload_content(
     file: Optional[UploadFile] = File(None),
     youtube_url: Optional[str] = Form(None),
     title: str = Form(...),
+    link_duplicates: bool = Form(True),
     current_user: dict = Depends(get_current_user)
 ):
     if not file and not youtube_url:
         raise HTTPException(status_code=400, detail="Either file or YouTube URL is required")
     
+    async with admission.admit("upload", str(current_user["_id"])):
+        return await _process_upload(file, youtube_url, title, link_duplicates, current_user)
+
+async def _load_dedup_index(db, user_id: str):
+    """Build the user's LSH index from stored signatures when it is missing or stale."""
+    query = {"user_id": user_id, "minhash": {"$exists": True}}
+    stored = await db.content.count_documents(query)
+    if dedup_service.indexed_count(user_id) != stored:
+        entries = [(str(doc["_id"]), doc["minhash"]) async for doc in db.content.find(query, {"minhash": 1})]
+        dedup_service.load_user(user_id, entries)
+
+async def _find_duplicate(db, user_id: str, signature) -> Optional[dict]:
+    """The user's existing content this transcript nearly duplicates, if any."""
+    await _load_dedup_index(db, user_id)
+    match = dedup_service.find_duplicate(user_id, signature)
+    if not match:
+        return None
+    original = await db.content.find_one({"_id": {"$in": id_values([match[0]])}, "user_id": user_id})
+    if original is not None:
+        original["similarity"] = match[1]
+    return original
+
+async def _process_upload(file: Optional[UploadFile], youtube_url: Optional[str], title: str,
+                          link_duplicates: bool, current_user: dict):
     db = get_database()
+    user_id = str(current_user["_id"])
     
     try:
         # Process content based on input type
@@ -136,9 +286,10 @@ async def upload_content(
             # Save uploaded file
             file_path = f"uploads/{file.filename}"
             os.makedirs("uploads", exist_ok=True)
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
+            with stage("write_upload"):
+                with open(file_path, "wb") as buffer:
+                    content = await file.read()
+                    buffer.write(content)
             
             # For MVP, we'll mock the transcription
             transcript = "This is a mock transcript of the uploaded video content. In production, this would be generated using speech-to-text services."
@@ -150,12 +301,21 @@ async def upload_content(
             content_type = "youtube"
             source_url = youtube_url
         
+        # Near-duplicates of existing content reuse its summary, vectors and quizzes
+        signature = await admission.offload(dedup_service.signature, transcript)
+        duplicate = None
+        if signature is not None and link_duplicates:
+            duplicate = await _find_duplicate(db, user_id, signature)
+        
         # Generate summary
-        summary = await nlp_service.generate_summary(transcript)
+        if duplicate:
+            summary = duplicate["summary"]
+        else:
+            summary = await admission.offload(nlp_service.generate_summary, transcript)
         
         # Store content in database
         content_doc = {
-            "user_id": str(current_user["_id"]),
+            "user_id": user_id,
             "title": title,
             "content_type": content_type,
             "source_url": source_url,
@@ -164,11 +324,44 @@ async def upload_content(
             "created_at": datetime.utcnow(),
             "language": "en"
         }
+        content_doc["content_hash"] = content_fingerprint(content_doc)
+        if signature is not None:
+            content_doc["minhash"] = dedup_service.encode(signature)
+        if duplicate:
+            # Always point at the original, never at another duplicate
+            content_doc["duplicate_of"] = duplicate.get("duplicate_of") or str(duplicate["_id"])
+            content_doc["duplicate_similarity"] = round(duplicate["similarity"], 3)
         
         result = await db.content.insert_one(content_doc)
+        if signature is not None:
+            dedup_service.add(user_id, str(result.inserted_id), signature)
+        
+        # Duplicates are searchable too: their titles and timestamps differ from the original
+        await admission.offload(
+            search_index.add_document,
+            user_id,
+            str(result.inserted_id),
+            title,
+            transcript
+        )
         
-        # Store in vector database for RAG
-        await vector_service.store_content(str(result.inserted_id), transcript, summary)
+        if not duplicate:
+            # Store in vector database for RAG
+            await admission.offload(
+                vector_service.store_content,
+                str(result.inserted_id),
+                transcript,
+                summary,
+                user_id=user_id
+            )
+            
+            # Update the user's document frequencies used for keyword IDF
+            await admission.offload(
+                term_stats.add_document,
+                user_id,
+                str(result.inserted_id),
+                transcript
+            )
         
         return ContentResponse(
             id=str(result.inserted_id),
@@ -176,7 +369,8 @@ async def upload_content(
             content_type=content_type,
             summary=summary,
             language="en",
-            created_at=content_doc["created_at"]
+            created_at=content_doc["created_at"],
+            duplicate_of=content_doc.get("duplicate_of")
         )
         
     except Exception as e:
@@ -194,23 +388,47 @@ async def get_user_content(current_user: dict = Depends(get_current_user)):
             content_type=content["content_type"],
             summary=content["summary"],
             language=content["language"],
-            created_at=content["created_at"]
+            created_at=content["created_at"],
+            duplicate_of=content.get("duplicate_of")
         ))
     
     return content_list
 
 @app.get("/api/content/{content_id}", response_model=ContentDetailResponse)
-async def get_content_detail(content_id: str, current_user: dict = Depends(get_current_user)):
+async def get_content_detail(
+    content_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
     db = get_database()
-    
-    content = await db.content.find_one({
-        "_id": content_id,
+    query = {
+        "_id": {"$in": id_values([content_id])},
         "user_id": str(current_user["_id"])
-    })
+    }
+    
+    # Revalidation: check the stored fingerprint without fetching the transcript
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        meta = await db.content.find_one(query, {"content_hash": 1})
+        if not meta:
+            raise HTTPException(status_code=404, detail="Content not found")
+        if meta.get("content_hash"):
+            etag = f'"{meta["content_hash"]}"'
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    
+    content = await db.content.find_one(query)
     
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     
+    etag = f'"{content.get("content_hash") or content_fingerprint(content)}"'
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    
     return ContentDetailResponse(
         id=str(content["_id"]),
         title=content["title"],
@@ -218,7 +436,8 @@ async def get_content_detail(content_id: str, current_user: dict = Depends(get_c
         summary=content["summary"],
         transcript=content["transcript"],
         language=content["language"],
-        created_at=content["created_at"]
+        created_at=content["created_at"],
+        duplicate_of=content.get("duplicate_of")
     )
 
 @app.post("/api/content/{content_id}/translate")
@@ -258,39 +477,76 @@ async def generate_quiz(
     db = get_database()
     
     content = await db.content.find_one({
-        "_id": content_id,
+        "_id": {"$in": id_values([content_id])},
         "user_id": str(current_user["_id"])
     })
     
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     
-    try:
-        quiz_data = await quiz_service.generate_quiz(
-            content["transcript"],
-            quiz_request.num_questions,
-            quiz_request.difficulty
-        )
-        
-        # Store quiz in database
-        quiz_doc = {
-            "content_id": content_id,
-            "user_id": str(current_user["_id"]),
-            "questions": quiz_data["questions"],
-            "created_at": datetime.utcnow()
-        }
-        
-        result = await db.quizzes.insert_one(quiz_doc)
-        
-        return QuizResponse(
-            id=str(result.inserted_id),
-            content_id=content_id,
-            questions=quiz_data["questions"],
-            created_at=quiz_doc["created_at"]
+    # A near-duplicate upload shares the original's quiz when one was generated with the same settings
+    if content.get("duplicate_of"):
+        async for quiz in db.quizzes.find({
+            "content_id": content["duplicate_of"],
+            "user_id": str(current_user["_id"])
+        }):
+            requested = (quiz.get("num_questions", len(quiz["questions"])), quiz.get("difficulty", "medium"))
+            if requested == (quiz_request.num_questions, quiz_request.difficulty):
+                return QuizResponse(
+                    id=str(quiz["_id"]),
+                    content_id=quiz["content_id"],
+                    questions=quiz["questions"],
+                    created_at=quiz["created_at"]
+                )
+    
+    # Generation is CPU-bound: it queues for a slot and runs off the event loop
+    async with admission.admit("quiz_generate", str(current_user["_id"])):
+        try:
+            quiz_data = await admission.offload(
+                quiz_service.generate_quiz,
+                content["transcript"],
+                quiz_request.num_questions,
+                quiz_request.difficulty
+            )
+            
+            # Store quiz in database
+            quiz_doc = {
+                "content_id": content_id,
+                "user_id": str(current_user["_id"]),
+                "questions": quiz_data["questions"],
+                "num_questions": quiz_request.num_questions,
+                "difficulty": quiz_request.difficulty,
+                "created_at": datetime.utcnow()
+            }
+            
+            result = await db.quizzes.insert_one(quiz_doc)
+            
+            return QuizResponse(
+                id=str(result.inserted_id),
+                content_id=content_id,
+                questions=quiz_data["questions"],
+                created_at=quiz_doc["created_at"]
+            )
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Quiz generation failed: {str(e)}")
+
+async def _get_answer_key(quiz_id: str, current_user: dict):
+    """Get the cached answer key for a quiz owned by the current user, loading it once."""
+    key = grading_service.get_key(quiz_id)
+    if key is None:
+        db = get_database()
+        quiz = await db.quizzes.find_one(
+            {"_id": {"$in": id_values([quiz_id])}, "user_id": str(current_user["_id"])},
+            {"questions.correct_answer": 1, "user_id": 1}
         )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Quiz generation failed: {str(e)}")
+        if not quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        key = grading_service.build_key(quiz)
+    
+    if key.owner_id != str(current_user["_id"]):
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return key
 
 @app.post("/api/quiz/{quiz_id}/submit")
 async def submit_quiz(
@@ -298,29 +554,13 @@ async def submit_quiz(
     submission: QuizSubmission,
     current_user: dict = Depends(get_current_user)
 ):
-    db = get_database()
-    
-    quiz = await db.quizzes.find_one({
-        "_id": quiz_id,
-        "user_id": str(current_user["_id"])
-    })
-    
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
+    key = await _get_answer_key(quiz_id, current_user)
     
     # Calculate score
-    correct_answers = 0
-    total_questions = len(quiz["questions"])
-    
-    for i, answer in enumerate(submission.answers):
-        if i < len(quiz["questions"]):
-            correct_option = quiz["questions"][i]["correct_answer"]
-            if answer == correct_option:
-                correct_answers += 1
+    correct_answers, score = grading_service.grade(key, submission.answers)
+    total_questions = key.total_questions
     
-    score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
-    
-    # Store submission
+    # Store submission (concurrent submissions share insert_many round trips)
     submission_doc = {
         "quiz_id": quiz_id,
         "user_id": str(current_user["_id"]),
@@ -331,7 +571,7 @@ async def submit_quiz(
         "submitted_at": datetime.utcnow()
     }
     
-    await db.quiz_submissions.insert_one(submission_doc)
+    await submission_batcher.insert(submission_doc)
     
     return {
         "score": score,
@@ -339,22 +579,161 @@ async def submit_quiz(
         "total_questions": total_questions
     }
 
+@app.post("/api/quiz/{quiz_id}/submit/bulk")
+async def submit_quiz_bulk(
+    quiz_id: str,
+    bulk: BulkQuizSubmission,
+    current_user: dict = Depends(get_current_user)
+):
+    """Grade a whole class's answer sheets in one request."""
+    key = await _get_answer_key(quiz_id, current_user)
+    if not bulk.submissions:
+        return {"graded": 0, "average_score": 0, "results": []}
+    
+    correct, scores = grading_service.grade_batch(key, [item.answers for item in bulk.submissions])
+    
+    submitted_at = datetime.utcnow()
+    submission_docs = [
+        {
+            "quiz_id": quiz_id,
+            "user_id": str(current_user["_id"]),
+            "student_id": item.student_id,
+            "answers": item.answers,
+            "score": float(scores[i]),
+            "correct_answers": int(correct[i]),
+            "total_questions": key.total_questions,
+            "submitted_at": submitted_at
+        }
+        for i, item in enumerate(bulk.submissions)
+    ]
+    
+    db = get_database()
+    for start in range(0, len(submission_docs), BULK_INSERT_BATCH_SIZE):
+        await db.quiz_submissions.insert_many(
+            submission_docs[start:start + BULK_INSERT_BATCH_SIZE],
+            ordered=False
+        )
+    
+    return {
+        "graded": len(submission_docs),
+        "average_score": round(float(scores.mean()), 2),
+        "results": [
+            {
+                "student_id": doc["student_id"],
+                "score": doc["score"],
+                "correct_answers": doc["correct_answers"],
+                "total_questions": doc["total_questions"]
+            }
+            for doc in submission_docs
+        ]
+    }
+
 # Q&A endpoints
 @app.post("/api/qa/ask")
 async def ask_question(
     question_request: QuestionRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    try:
-        answer = await vector_service.query(
-            question_request.question,
-            str(current_user["_id"])
+    content_id = question_request.content_id
+    if content_id:
+        # Near-duplicates are answered from the original content's vectors
+        content = await get_database().content.find_one(
+            {"_id": {"$in": id_values([content_id])}, "user_id": str(current_user["_id"])},
+            {"duplicate_of": 1}
         )
+        if content and content.get("duplicate_of"):
+            content_id = content["duplicate_of"]
+    
+    # Cached answers skip admission; misses run retrieval like the other heavy paths
+    cached = vector_service.cached_answer(
+        question_request.question,
+        str(current_user["_id"]),
+        content_id=content_id
+    )
+    if cached is not None:
+        return {"answer": cached}
+    
+    async with admission.admit("qa_ask", str(current_user["_id"])):
+        try:
+            answer = await admission.offload(
+                vector_service.query,
+                question_request.question,
+                str(current_user["_id"]),
+                content_id=content_id
+            )
+            
+            return {"answer": answer}
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Question processing failed: {str(e)}")
+
+# Search endpoints
+async def _sync_search_index(db, user_id: str):
+    """Index content stored before search existed (or while the index was unavailable)."""
+    stored = await db.content.count_documents({"user_id": user_id})
+    if stored <= await asyncio.to_thread(search_index.indexed_count, user_id):
+        return
+    documents = [
+        (str(doc["_id"]), doc.get("title", ""), doc.get("transcript", ""))
+        async for doc in db.content.find({"user_id": user_id}, {"title": 1, "transcript": 1})
+    ]
+    with stage("search_backfill"):
+        await asyncio.to_thread(search_index.add_documents, user_id, documents)
+
+@app.get("/api/search", response_model=SearchResponse)
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=500),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    """Full-text search over the user's transcripts and titles.
+    
+    Words are ANDed; "quoted phrases" match in order and word* matches any
+    word with that prefix. Hits carry character offsets of every match and
+    highlighted snippets.
+    """
+    db = get_database()
+    user_id = str(current_user["_id"])
+    
+    try:
+        await _sync_search_index(db, user_id)
+        with stage("search"):
+            total, hits = await asyncio.to_thread(
+                search_index.search, user_id, q, (page - 1) * page_size, page_size
+            )
+        
+        # Only the page's documents are fetched, for titles and snippet text
+        documents = {}
+        if hits:
+            async for doc in db.content.find(
+                {"_id": {"$in": id_values([hit.content_id for hit in hits])}, "user_id": user_id},
+                {"title": 1, "content_type": 1, "created_at": 1, "transcript": 1}
+            ):
+                documents[str(doc["_id"])] = doc
         
-        return {"answer": answer}
+        results = []
+        for hit in hits:
+            doc = documents.get(hit.content_id)
+            if doc is None:
+                continue
+            transcript = doc.get("transcript", "")
+            results.append(SearchHit(
+                content_id=hit.content_id,
+                title=doc["title"],
+                content_type=doc["content_type"],
+                created_at=doc["created_at"],
+                score=round(hit.score, 4),
+                match_count=len(hit.matches) + len(hit.title_matches),
+                title_highlights=match_offsets(doc["title"], hit.title_matches),
+                offsets=match_offsets(transcript, hit.matches),
+                snippets=build_snippets(transcript, hit.matches)
+            ))
+        
+        return SearchResponse(query=q, total=total, page=page, page_size=page_size, hits=results)
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Question processing failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 # Analytics endpoints
 @app.get("/api/analytics")
@@ -383,5 +762,22 @@ async def get_analytics(current_user: dict = Depends(get_current_user)):
         "average_score": round(avg_score, 2)
     }
 
+# SPA routes are registered last so the catch-all doesn't shadow API routes
+@app.get("/")
+async def read_root(request: Request):
+    return spa_index.response(request)
+
+@app.get("/{full_path:path}")
+async def serve_spa(full_path: str, request: Request):
+    # Don't serve SPA for API routes or static files
+    if full_path.startswith("api/") or full_path.startswith("src/") or full_path.startswith("uploads/") or full_path.startswith("attached_assets/"):
+        raise HTTPException(status_code=404, detail="Not found")
+    
+    # For any other route, serve the React SPA
+    return spa_index.response(request)
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WORKERS > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
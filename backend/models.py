@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 
+from config import QUIZ_BULK_MAX_SUBMISSIONS
+
 # User models
 class UserCreate(BaseModel):
     email: EmailStr
@@ -28,6 +30,7 @@ class ContentResponse(BaseModel):
     summary: str
     language: str
     created_at: datetime
+    duplicate_of: Optional[str] = None
 
 class ContentDetailResponse(ContentResponse):
     transcript: str
@@ -58,11 +61,43 @@ class QuizResponse(BaseModel):
 class QuizSubmission(BaseModel):
     answers: List[str]
 
+class BulkSubmissionItem(BaseModel):
+    student_id: Optional[str] = None
+    answers: List[str]
+
+class BulkQuizSubmission(BaseModel):
+    submissions: List[BulkSubmissionItem] = Field(max_length=QUIZ_BULK_MAX_SUBMISSIONS)
+
 # Q&A models
 class QuestionRequest(BaseModel):
     question: str
     content_id: Optional[str] = None
 
+# Search models
+class SearchSnippet(BaseModel):
+    text: str
+    start: int
+    end: int
+    highlights: List[Tuple[int, int]]
+
+class SearchHit(BaseModel):
+    content_id: str
+    title: str
+    content_type: str
+    created_at: datetime
+    score: float
+    match_count: int
+    title_highlights: List[Tuple[int, int]]
+    offsets: List[Tuple[int, int]]
+    snippets: List[SearchSnippet]
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    page: int
+    page_size: int
+    hits: List[SearchHit]
+
 # Token model
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,33 @@
+import hashlib
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires (W/ prefixes are ignored)."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def content_fingerprint(content: dict) -> str:
+    """Hash of the fields returned by content detail, used as its ETag."""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in ("title", "content_type", "summary", "transcript", "language"):
+        digest.update(str(content.get(field, "")).encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(str(content.get("created_at", "")).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,155 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+# Mersenne prime for the universal hash family; a * x stays below 2**63 for 32-bit x
+_PRIME = np.uint64((1 << 31) - 1)
+_SHINGLE_MULTIPLIER = np.uint64(1_000_003)
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+class MinHasher:
+    """MinHash signatures over word shingles (estimates Jaccard similarity)."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1, block_size: int = 4096):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.block_size = block_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, int(_PRIME), size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, int(_PRIME), size=num_perm).astype(np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Distinct 32-bit hashes of the text's word n-grams."""
+        words = _WORD.findall(text.lower())
+        if not words:
+            return np.zeros(0, dtype=np.uint64)
+
+        # Hash each distinct word once, then combine neighbours with a polynomial hash
+        word_hashes = {}
+        hashes = np.fromiter(
+            (word_hashes.setdefault(word, zlib.crc32(word.encode("utf-8"))) for word in words),
+            dtype=np.uint64, count=len(words)
+        )
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+        combined = hashes[:count].copy()
+        for offset in range(1, size):
+            combined = combined * _SHINGLE_MULTIPLIER + hashes[offset:offset + count]
+        return np.unique(combined & _MASK32)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        shingles = self.shingles(text)
+        if not shingles.size:
+            return None
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        # Blocked so a long transcript never materializes shingles x permutations at once
+        for start in range(0, shingles.size, self.block_size):
+            block = shingles[start:start + self.block_size, None]
+            np.minimum(signature, ((block * self.a + self.b) % _PRIME).min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(first == second))
+
+class LshIndex:
+    """Banded LSH over MinHash signatures: candidates share at least one band."""
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: List[Dict[bytes, Set[str]]] = [defaultdict(set) for _ in range(bands)]
+        self.signatures: Dict[str, np.ndarray] = {}
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, key: str, signature: np.ndarray):
+        if key in self.signatures:
+            return
+        self.signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets[band_key].add(key)
+
+    def candidates(self, signature: np.ndarray) -> Set[str]:
+        found = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            found.update(buckets.get(band_key, ()))
+        return found
+
+    def __len__(self):
+        return len(self.signatures)
+
+class DedupService:
+    """Per-user near-duplicate detection for uploaded transcripts.
+
+    Signatures are stored on the content documents; each user's LSH index is
+    rebuilt from them whenever the stored count differs from the in-memory one
+    (first use, or another worker ingested content).
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 3,
+                 threshold: float = 0.8, max_users: int = 1024):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, LshIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        return self.hasher.signature(text)
+
+    @staticmethod
+    def encode(signature: np.ndarray) -> bytes:
+        return signature.astype(np.uint32).tobytes()
+
+    @staticmethod
+    def decode(data: bytes) -> np.ndarray:
+        return np.frombuffer(bytes(data), dtype=np.uint32)
+
+    def indexed_count(self, user_id: str) -> Optional[int]:
+        """Signatures held for a user, or None if their index isn't loaded."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            return len(index) if index is not None else None
+
+    def load_user(self, user_id: str, entries: Iterable[Tuple[str, bytes]]):
+        """(Re)build a user's index from stored (content_id, signature bytes) pairs."""
+        index = LshIndex(self.bands, self.rows)
+        for content_id, data in entries:
+            signature = self.decode(data)
+            if signature.size == self.bands * self.rows:
+                index.add(content_id, signature)
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+
+    def find_duplicate(self, user_id: str, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Best stored match at or above the threshold, as (content_id, similarity)."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                return None
+            best = None
+            for content_id in index.candidates(signature):
+                score = similarity(signature, index.signatures[content_id])
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (content_id, score)
+            return best
+
+    def add(self, user_id: str, content_id: str, signature: np.ndarray):
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                index.add(content_id, signature)
@@ -0,0 +1,151 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+class AnswerKey:
+    """Compact answer key for one quiz.
+
+    Options are single letters, so each answer sheet packs into one string and
+    a whole class becomes a (submissions x questions) code matrix in one copy.
+    """
+
+    def __init__(self, quiz_id: str, owner_id: str, correct_answers: List[str]):
+        self.quiz_id = quiz_id
+        self.owner_id = owner_id
+        self.total_questions = len(correct_answers)
+        self.single_char = all(len(answer) == 1 for answer in correct_answers)
+        if self.single_char:
+            self.answers = _char_codes("".join(correct_answers))
+        else:
+            self.answers = np.array(correct_answers, dtype=str)
+
+    def to_matrix(self, submissions: List[List[str]]) -> np.ndarray:
+        """Stack answer sheets into a matrix comparable with ``answers``; padding never matches."""
+        total = self.total_questions
+        if not self.single_char:
+            rows = [list(answers[:total]) + [""] * (total - len(answers[:total])) for answers in submissions]
+            return np.array(rows, dtype=str).reshape(len(submissions), total)
+
+        # Blank or multi-character answers can't match a one-letter option
+        sheets = [
+            "".join(answer if len(answer) == 1 else "\0" for answer in answers[:total]).ljust(total, "\0")
+            for answers in submissions
+        ]
+        return _char_codes("".join(sheets)).reshape(len(submissions), total)
+
+def _char_codes(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+class GradingService:
+    """Grades quiz submissions against cached answer keys."""
+
+    def __init__(self, max_keys: int = 1024):
+        self.max_keys = max_keys
+        self._keys: "OrderedDict[str, AnswerKey]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, quiz_id: str) -> Optional[AnswerKey]:
+        key = self._keys.get(quiz_id)
+        if key is None:
+            self.misses += 1
+            return None
+        self._keys.move_to_end(quiz_id)
+        self.hits += 1
+        return key
+
+    def build_key(self, quiz: Dict[str, Any]) -> AnswerKey:
+        """Build and cache the answer key for a quiz document."""
+        key = AnswerKey(
+            str(quiz["_id"]),
+            quiz["user_id"],
+            [question["correct_answer"] for question in quiz["questions"]]
+        )
+        self._keys[key.quiz_id] = key
+        self._keys.move_to_end(key.quiz_id)
+        while len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+        return key
+
+    def grade(self, key: AnswerKey, answers: List[str]) -> Tuple[int, float]:
+        """Grade one submission; returns (correct_answers, score)."""
+        correct, scores = self.grade_batch(key, [answers])
+        return int(correct[0]), float(scores[0])
+
+    def grade_batch(self, key: AnswerKey, submissions: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Grade many submissions at once; returns (correct_answers, scores) arrays."""
+        matrix = key.to_matrix(submissions)
+        correct = (matrix == key.answers).sum(axis=1)
+        if key.total_questions > 0:
+            scores = correct / key.total_questions * 100
+        else:
+            scores = np.zeros(len(submissions))
+        return correct, scores
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cached_keys": len(self._keys), "hits": self.hits, "misses": self.misses}
+
+class InsertBatcher:
+    """Coalesces concurrent single-document inserts into ``insert_many`` round trips.
+
+    Each caller still awaits its own write, so a response is only sent once the
+    document is persisted; under load, many submissions share one round trip.
+    """
+
+    def __init__(self, get_collection: Callable[[], Any], max_batch: int = 200, max_delay: float = 0.005):
+        self.get_collection = get_collection
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle = None
+        self._tasks = set()
+
+    async def insert(self, document: Dict[str, Any]):
+        if self.max_delay <= 0:
+            await self.get_collection().insert_one(document)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((document, future))
+        if len(self._pending) >= self.max_batch:
+            self._schedule(0)
+        elif self._flush_handle is None:
+            self._schedule(self.max_delay)
+        await future
+
+    def _schedule(self, delay: float):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self):
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            await self.get_collection().insert_many([document for document, _ in batch], ordered=False)
+            failed = {}
+        except Exception as e:
+            # With ordered=False only the listed documents failed (pymongo BulkWriteError)
+            write_errors = (getattr(e, "details", None) or {}).get("writeErrors")
+            if write_errors:
+                failed = {error["index"]: e for error in write_errors}
+            else:
+                failed = {index: e for index in range(len(batch))}
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+            else:
+                future.set_result(None)
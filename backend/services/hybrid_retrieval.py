@@ -0,0 +1,333 @@
+import contextvars
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from instrumentation import record_stage
+
+# Same token rule as scikit-learn's default, so BM25 and TF-IDF agree on terms
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+
+# Retrievers run side by side on a small shared pool
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+_stop_words = frozenset()
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without English stop words."""
+    global _stop_words
+    if not _stop_words:
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        _stop_words = ENGLISH_STOP_WORDS
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in _stop_words]
+
+def top_k(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Indices and scores of the k largest positive entries, best first."""
+    if k <= 0 or scores.size == 0:
+        return []
+    k = min(k, scores.size)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [(int(i), float(scores[i])) for i in candidates if scores[i] > 0]
+
+class BM25Index:
+    """Okapi BM25 over an in-memory inverted index (term -> posting arrays).
+
+    With ``compress`` each posting keeps only its precomputed term weight as
+    float16 (6 bytes instead of 12), and ``max_terms`` prunes every document to
+    its highest-impact terms; ``exact_scores`` recomputes full BM25 from the
+    text for the candidates such an index returns.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, compress: bool = False, max_terms: int = 0):
+        self.k1 = k1
+        self.b = b
+        self.compress = compress
+        self.max_terms = max_terms
+        self.num_docs = 0
+        self.postings: Dict[str, Tuple[np.ndarray, ...]] = {}
+        self.idf: Dict[str, float] = {}
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.avgdl = 1.0
+
+    def build(self, texts: Sequence[str]):
+        raw = defaultdict(list)
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[doc] = sum(counts.values())
+            for term, count in counts.items():
+                raw[term].append((doc, count))
+
+        self.num_docs = len(texts)
+        avgdl = float(lengths.mean()) if self.num_docs and lengths.mean() > 0 else 1.0
+        self.lengths = lengths
+        self.avgdl = avgdl
+        self.postings = {}
+        self.idf = {}
+        for term, entries in raw.items():
+            docs = np.fromiter((doc for doc, _ in entries), dtype=np.int32, count=len(entries))
+            tfs = np.fromiter((count for _, count in entries), dtype=np.float32, count=len(entries))
+            # Per-posting length normalization, precomputed so queries only add
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avgdl)
+            df = len(entries)
+            self.idf[term] = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            if self.compress:
+                self.postings[term] = (docs, tfs * (self.k1 + 1) / (tfs + norm))
+            else:
+                self.postings[term] = (docs, tfs, norm)
+
+        if self.compress:
+            self._compress()
+        return self
+
+    def _compress(self):
+        """Prune each document to its ``max_terms`` highest-impact terms and store weights as float16."""
+        if self.max_terms and self.postings:
+            terms = list(self.postings)
+            term_ids = np.concatenate([np.full(len(self.postings[term][0]), i, dtype=np.int32)
+                                       for i, term in enumerate(terms)])
+            docs = np.concatenate([self.postings[term][0] for term in terms])
+            weights = np.concatenate([self.postings[term][1] for term in terms])
+            impact = weights * np.fromiter((self.idf[term] for term in terms), dtype=np.float32,
+                                           count=len(terms))[term_ids]
+            # Rank each document's postings by impact and keep the head
+            order = np.lexsort((-impact, docs))
+            sorted_docs = docs[order]
+            starts = np.searchsorted(sorted_docs, sorted_docs, side="left")
+            kept = order[np.arange(len(order)) - starts < self.max_terms]
+            kept = kept[np.lexsort((docs[kept], term_ids[kept]))]
+            bounds = np.searchsorted(term_ids[kept], np.arange(len(terms) + 1))
+            self.postings = {
+                term: (docs[kept[bounds[i]:bounds[i + 1]]], weights[kept[bounds[i]:bounds[i + 1]]])
+                for i, term in enumerate(terms) if bounds[i + 1] > bounds[i]
+            }
+        self.postings = {term: (docs, weights.astype(np.float16)) for term, (docs, weights) in self.postings.items()}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for posting in self.postings.values() for array in posting)
+
+    def scores(self, tokens: Sequence[str]) -> np.ndarray:
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term in set(tokens):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            if self.compress:
+                docs, weights = posting
+                scores[docs] += np.multiply(weights, self.idf[term], dtype=np.float32)
+            else:
+                docs, tfs, norm = posting
+                scores[docs] += self.idf[term] * tfs * (self.k1 + 1) / (tfs + norm)
+        return scores
+
+    def exact_scores(self, tokens: Sequence[str], docs: Sequence[int], texts: Sequence[str]) -> np.ndarray:
+        """Full-precision BM25 of the given documents, recomputed from their text."""
+        terms = set(tokens)
+        scores = np.zeros(len(docs), dtype=np.float32)
+        for i, (doc, text) in enumerate(zip(docs, texts)):
+            # Query terms are already stop-word free, so raw tokens need no filtering
+            counts = Counter(token for token in TOKEN_PATTERN.findall(text.lower()) if token in terms)
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / self.avgdl)
+            scores[i] = sum(self.idf.get(term, 0.0) * tf * (self.k1 + 1) / (tf + norm) for term, tf in counts.items())
+        return scores
+
+    def search(self, tokens: Sequence[str], k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        scores = self.scores(tokens)
+        if mask is not None:
+            scores[~mask] = 0
+        return top_k(scores, k)
+
+class LsaEncoder:
+    """Dense encoder projecting TF-IDF vectors onto truncated-SVD (LSA) components."""
+
+    name = "lsa"
+
+    def __init__(self, vectorizer, components: np.ndarray):
+        self.vectorizer = vectorizer
+        self.components = np.asarray(components, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, vectorizer, tfidf_matrix, n_components: int = 128) -> Optional["LsaEncoder"]:
+        n_components = min(n_components, tfidf_matrix.shape[0] - 1, tfidf_matrix.shape[1] - 1)
+        if n_components < 2:
+            return None
+        from sklearn.decomposition import TruncatedSVD
+        # Near-identical documents have zero variance; the ratio warnings are harmless
+        with np.errstate(divide="ignore", invalid="ignore"):
+            svd = TruncatedSVD(n_components=n_components, random_state=0).fit(tfidf_matrix)
+        return cls(vectorizer, svd.components_)
+
+    def encode_matrix(self, tfidf_matrix) -> np.ndarray:
+        return _normalize_rows(np.asarray(tfidf_matrix @ self.components.T, dtype=np.float32))
+
+    def encode_documents(self, texts: Sequence[str], tfidf_matrix=None) -> np.ndarray:
+        if tfidf_matrix is None:
+            tfidf_matrix = self.vectorizer.transform(texts)
+        return self.encode_matrix(tfidf_matrix)
+
+    def encode_query(self, text: str) -> np.ndarray:
+        return self.encode_matrix(self.vectorizer.transform([text]))[0]
+
+class SentenceEncoder:
+    """Dense encoder backed by a sentence-transformers model (loaded on first use)."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        self.model_name = model_name
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode_documents(self, texts: Sequence[str], tfidf_matrix=None) -> np.ndarray:
+        return _normalize_rows(np.asarray(self._get_model().encode(list(texts)), dtype=np.float32))
+
+    def encode_query(self, text: str) -> np.ndarray:
+        return self.encode_documents([text])[0]
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Tuple[int, float]]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked lists by summing 1 / (k + rank) per item."""
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, (item, _) in enumerate(ranking, start=1):
+            fused[item] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+class HybridRetriever:
+    """BM25 + dense retrieval fused with RRF, re-scoring only the top candidates.
+
+    The dense and re-ranking stages are skipped when they would overrun the
+    latency budget, so a query degrades to lexical-only instead of going slow.
+    """
+
+    def __init__(self, bm25: BM25Index, encoder=None, dense_vectors: Optional[np.ndarray] = None,
+                 budget_ms: float = 100.0, candidate_depth: int = 50, rerank_depth: int = 20,
+                 rrf_k: int = 60, min_dense_score: float = 0.2, dense_codes=None,
+                 rescore_candidates: int = 100):
+        self.bm25 = bm25
+        self.encoder = encoder
+        self.dense_vectors = dense_vectors
+        # Optional quantized copy of dense_vectors searched first; only its top candidates are re-scored exactly
+        self.dense_codes = dense_codes
+        self.rescore_candidates = rescore_candidates
+        self.budget_ms = budget_ms
+        self.candidate_depth = candidate_depth
+        self.rerank_depth = rerank_depth
+        self.rrf_k = rrf_k
+        self.min_dense_score = min_dense_score
+        self.dense_timeouts = 0
+
+    def _dense_search(self, question: str, k: int, mask: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        start = time.perf_counter()
+        query_vector = self.encoder.encode_query(question)
+        if self.dense_codes is not None:
+            approximate = self.dense_codes.scores(query_vector)
+            if mask is not None:
+                approximate[~mask] = 0
+            rows = np.sort(np.fromiter(
+                (row for row, _ in top_k(approximate, max(k, self.rescore_candidates))), dtype=np.int64
+            ))
+            # Sorted rows keep reads of the memory-mapped full vectors sequential
+            exact = np.asarray(self.dense_vectors[rows], dtype=np.float32) @ query_vector
+            exact[exact < self.min_dense_score] = 0
+            results = [(int(rows[i]), score) for i, score in top_k(exact, k)]
+        else:
+            scores = np.asarray(self.dense_vectors @ query_vector, dtype=np.float32)
+            if mask is not None:
+                scores[~mask] = 0
+            scores[scores < self.min_dense_score] = 0
+            results = top_k(scores, k)
+        record_stage("retrieval.dense", time.perf_counter() - start)
+        return results
+
+    def _lexical_search(self, tokens: List[str], k: int, mask: Optional[np.ndarray],
+                        get_text: Optional[Callable[[int], str]] = None,
+                        deadline: Optional[float] = None) -> List[Tuple[int, float]]:
+        start = time.perf_counter()
+        if not (self.bm25.max_terms and get_text is not None):
+            # Unpruned float16 weights rank within rounding of the exact scores
+            results = self.bm25.search(tokens, k, mask)
+        else:
+            results = self.bm25.search(tokens, max(k, self.rescore_candidates), mask)
+            # Pruned postings under-count some documents; re-score the candidates from their text
+            if results and (deadline is None or time.perf_counter() < deadline):
+                rows = [row for row, _ in results]
+                exact = self.bm25.exact_scores(tokens, rows, [get_text(row) for row in rows])
+                results = [(rows[i], score) for i, score in top_k(exact, k)]
+            else:
+                results = results[:k]
+        record_stage("retrieval.bm25", time.perf_counter() - start)
+        return results
+
+    def rescore(self, tokens: List[str], text: str) -> float:
+        """Best single-sentence coverage of the question's IDF mass (0..1)."""
+        weights = {token: self.bm25.idf.get(token, 0.0) for token in set(tokens)}
+        total = sum(weights.values())
+        if total <= 0:
+            return 0.0
+        best = 0.0
+        for sentence in SENTENCE_SPLIT.split(text):
+            sentence_tokens = set(TOKEN_PATTERN.findall(sentence.lower()))
+            covered = sum(weight for token, weight in weights.items() if token in sentence_tokens)
+            best = max(best, covered / total)
+            if best >= 1.0:
+                break
+        return best
+
+    def search(self, question: str, k: int = 5, mask: Optional[np.ndarray] = None,
+               get_text: Optional[Callable[[int], str]] = None) -> List[Tuple[int, float]]:
+        """Rank documents for a question; returns (row index, score) best first."""
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        tokens = tokenize(question)
+        depth = max(k, self.candidate_depth)
+
+        dense_future = None
+        if self.encoder is not None and self.dense_vectors is not None and len(self.dense_vectors):
+            context = contextvars.copy_context()
+            dense_future = _executor.submit(context.run, self._dense_search, question, depth, mask)
+
+        rankings = [self._lexical_search(tokens, depth, mask, get_text, deadline)]
+        if dense_future is not None:
+            try:
+                rankings.append(dense_future.result(timeout=max(0.0, deadline - time.perf_counter())))
+            except FutureTimeoutError:
+                self.dense_timeouts += 1
+
+        fused = reciprocal_rank_fusion(rankings, self.rrf_k)
+        if not fused:
+            return []
+
+        # Re-score only the head of the fused list, and only while budget remains
+        if get_text is not None and tokens:
+            start = time.perf_counter()
+            top_fused = fused[0][1]
+            rescored = []
+            for index, fused_score in fused[:self.rerank_depth]:
+                if time.perf_counter() >= deadline:
+                    # Out of budget: keep the fused order rather than mix score scales
+                    rescored = None
+                    break
+                coverage = self.rescore(tokens, get_text(index))
+                rescored.append((index, 0.5 * coverage + 0.5 * fused_score / top_fused))
+            if rescored is not None:
+                rescored.sort(key=lambda item: item[1], reverse=True)
+                fused = rescored + fused[self.rerank_depth:]
+            record_stage("retrieval.rerank", time.perf_counter() - start)
+
+        return fused[:k]
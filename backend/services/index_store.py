@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from services.user_files import file_lock, file_version
+
+class IndexSnapshotStore:
+    """Versioned on-disk snapshots of the vector index, shareable across worker processes.
+
+    Each write produces an immutable ``snapshots/v<N>/`` directory and then atomically
+    repoints ``CURRENT`` at it. Writers serialize on an exclusive file lock, so whichever
+    worker holds the lock acts as the index owner for that write; readers notice the
+    version bump with a single ``stat`` and memory-map the new snapshot's arrays.
+    """
+
+    def __init__(self, storage_path: str, keep_snapshots: int = 3):
+        self.storage_path = storage_path
+        self.snapshots_path = os.path.join(storage_path, "snapshots")
+        self.current_path = os.path.join(storage_path, "CURRENT")
+        self.lock_path = os.path.join(storage_path, "index.lock")
+        self.keep_snapshots = keep_snapshots
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._current_stat = None
+        self._current_version = 0
+        os.makedirs(self.snapshots_path, exist_ok=True)
+
+    @contextmanager
+    def lock(self):
+        """Hold the cross-process write lock (and an in-process lock for threads)."""
+        with self._thread_lock:
+            # Re-entrant: a nested lock() in the holding thread doesn't re-flock
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+
+            with file_lock(self.lock_path):
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+
+    def current_version(self) -> int:
+        """Get the latest published version (0 if none); cheap when unchanged."""
+        key = file_version(self.current_path)
+        if key is None:
+            return 0
+        if key != self._current_stat:
+            with open(self.current_path, "r", encoding="utf-8") as f:
+                self._current_version = int(f.read().strip() or 0)
+            self._current_stat = key
+        return self._current_version
+
+    def _snapshot_dir(self, version: int) -> str:
+        return os.path.join(self.snapshots_path, f"v{version:08d}")
+
+    def write(self, documents: Dict[str, Any], vocabulary: Optional[Dict[str, int]], idf, vectors,
+              meta: Optional[Dict[str, Any]] = None, extras: Optional[Dict[str, np.ndarray]] = None) -> int:
+        """Publish a new snapshot; call while holding ``lock()``."""
+        version = self.current_version() + 1
+        final_dir = self._snapshot_dir(version)
+        tmp_dir = final_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        with open(os.path.join(tmp_dir, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump(documents, f, ensure_ascii=False)
+
+        if vocabulary is not None and vectors is not None:
+            with open(os.path.join(tmp_dir, "vocabulary.json"), "w", encoding="utf-8") as f:
+                json.dump({term: int(index) for term, index in vocabulary.items()}, f)
+            vectors = vectors.tocsr()
+            np.save(os.path.join(tmp_dir, "idf.npy"), np.asarray(idf))
+            np.save(os.path.join(tmp_dir, "data.npy"), vectors.data)
+            np.save(os.path.join(tmp_dir, "indices.npy"), vectors.indices)
+            np.save(os.path.join(tmp_dir, "indptr.npy"), vectors.indptr)
+
+        # Additional dense arrays (e.g. embeddings) stored alongside the index
+        extras = {name: array for name, array in (extras or {}).items() if array is not None}
+        for name, array in extras.items():
+            np.save(os.path.join(tmp_dir, f"extra_{name}.npy"), np.asarray(array))
+
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": version,
+                "shape": list(vectors.shape) if vectors is not None else None,
+                "extras": sorted(extras),
+                **(meta or {}),
+            }, f)
+
+        os.replace(tmp_dir, final_dir)
+
+        # Atomically publish the new version
+        pointer_tmp = self.current_path + ".tmp"
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(str(version))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, self.current_path)
+
+        self._prune(version)
+        return version
+
+    def read(self, version: int) -> Dict[str, Any]:
+        """Load a snapshot; sparse matrix arrays are memory-mapped, not copied."""
+        from scipy.sparse import csr_matrix
+
+        snapshot_dir = self._snapshot_dir(version)
+        with open(os.path.join(snapshot_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(snapshot_dir, "documents.json"), "r", encoding="utf-8") as f:
+            documents = json.load(f)
+
+        snapshot = {"version": version, "meta": meta, "documents": documents,
+                    "vocabulary": None, "idf": None, "vectors": None,
+                    "extras": {
+                        name: np.load(os.path.join(snapshot_dir, f"extra_{name}.npy"), mmap_mode="r")
+                        for name in meta.get("extras", [])
+                    }}
+        if meta.get("shape"):
+            with open(os.path.join(snapshot_dir, "vocabulary.json"), "r", encoding="utf-8") as f:
+                snapshot["vocabulary"] = json.load(f)
+            snapshot["idf"] = np.load(os.path.join(snapshot_dir, "idf.npy"))
+            arrays = [
+                np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode="r")
+                for name in ("data", "indices", "indptr")
+            ]
+            snapshot["vectors"] = csr_matrix(tuple(arrays), shape=tuple(meta["shape"]), copy=False)
+        return snapshot
+
+    def read_extra(self, version: int, name: str) -> np.ndarray:
+        """Memory-map one extra array of a published snapshot."""
+        return np.load(os.path.join(self._snapshot_dir(version), f"extra_{name}.npy"), mmap_mode="r")
+
+    def _prune(self, latest: int):
+        # Readers that still map an older snapshot keep working after unlink
+        for name in os.listdir(self.snapshots_path):
+            if not name.startswith("v") or name.endswith(".tmp"):
+                continue
+            try:
+                version = int(name[1:])
+            except ValueError:
+                continue
+            if version <= latest - self.keep_snapshots:
+                shutil.rmtree(os.path.join(self.snapshots_path, name), ignore_errors=True)
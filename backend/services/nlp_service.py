@@ -1,26 +1,23 @@
 import re
-from typing import List
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import sent_tokenize, word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from collections import Counter
+from typing import List, Optional
 import numpy as np
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+from instrumentation import timed
+from services.hybrid_retrieval import tokenize
+from services.term_stats import TermStatistics, top_keywords
+from services.text_utils import sent_tokenize, stop_words
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+# scikit-learn and NLTK are imported on first use to keep worker startup fast
 
 class NLPService:
-    def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
+    def __init__(self, term_stats: Optional[TermStatistics] = None):
+        # Corpus document frequencies for keyword IDF; maintained at ingest
+        self.term_stats = term_stats
+    
+    @property
+    def stop_words(self):
+        return stop_words()
     
     def preprocess_text(self, text: str) -> str:
         """Clean and preprocess text."""
@@ -33,6 +30,7 @@ class NLPService:
         sentences = sent_tokenize(text)
         return [self.preprocess_text(sent) for sent in sentences if len(sent.strip()) > 10]
     
+    @timed("generate_summary")
     async def generate_summary(self, text: str, num_sentences: int = 3) -> str:
         """Generate extractive summary using TF-IDF and cosine similarity."""
         try:
@@ -43,6 +41,8 @@ class NLPService:
             if len(sentences) <= num_sentences:
                 return '. '.join(sentences)
             
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            
             # Create TF-IDF vectors
             vectorizer = TfidfVectorizer(stop_words='english', lowercase=True)
             tfidf_matrix = vectorizer.fit_transform(sentences)
@@ -62,29 +62,15 @@ class NLPService:
             sentences = self.extract_sentences(text)
             return '. '.join(sentences[:num_sentences]) + '.'
     
-    def extract_keywords(self, text: str, num_keywords: int = 10) -> List[str]:
-        """Extract keywords using TF-IDF."""
-        try:
-            vectorizer = TfidfVectorizer(stop_words='english', max_features=num_keywords)
-            tfidf_matrix = vectorizer.fit_transform([text])
-            
-            feature_names = vectorizer.get_feature_names_out()
-            tfidf_scores = tfidf_matrix.toarray()[0]
-            
-            # Get keywords sorted by score
-            keyword_scores = list(zip(feature_names, tfidf_scores))
-            keyword_scores.sort(key=lambda x: x[1], reverse=True)
-            
-            return [keyword for keyword, score in keyword_scores]
-            
-        except Exception:
-            # Fallback to simple word frequency
-            words = word_tokenize(text.lower())
-            words = [word for word in words if word.isalpha() and word not in self.stop_words]
-            
-            word_freq = {}
-            for word in words:
-                word_freq[word] = word_freq.get(word, 0) + 1
-            
-            sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-            return [word for word, freq in sorted_words[:num_keywords]]
+    def extract_keywords(self, text: str, num_keywords: int = 10, user_id: Optional[str] = None) -> List[str]:
+        """Extract keywords by TF-IDF against the user's library."""
+        counts = Counter(tokenize(text))
+        terms = list(counts)
+        idf = np.ones(len(terms))
+        if self.term_stats is not None:
+            try:
+                idf = self.term_stats.idf(user_id, terms)
+            except Exception as e:
+                # Without corpus statistics this degrades to term frequency
+                print(f"Error reading term statistics: {e}")
+        return top_keywords(counts, idf, num_keywords)
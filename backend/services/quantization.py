@@ -0,0 +1,172 @@
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+# Rows converted to float32 at a time when scoring codes, bounding temporary memory
+_BLOCK_ROWS = 65536
+
+class Int8Quantizer:
+    """Symmetric per-dimension int8 scalar quantization: one byte per dimension."""
+
+    name = "int8"
+
+    def __init__(self):
+        self.scale: Optional[np.ndarray] = None
+        self.codes: Optional[np.ndarray] = None
+
+    def fit(self, vectors: np.ndarray) -> "Int8Quantizer":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        peak = np.abs(vectors).max(axis=0) if len(vectors) else np.ones(vectors.shape[1], dtype=np.float32)
+        peak[peak == 0] = 1.0
+        self.scale = (peak / 127).astype(np.float32)
+        self.codes = np.zeros((0, vectors.shape[1]), dtype=np.int8)
+        self.add(vectors)
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(np.asarray(vectors, dtype=np.float32) / self.scale), -127, 127).astype(np.int8)
+
+    def add(self, vectors: np.ndarray):
+        """Append codes for new rows with the existing scale (outliers are clipped)."""
+        self.codes = np.concatenate([self.codes, self.encode(vectors)])
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate inner products of the query with every coded row."""
+        scaled = np.asarray(query, dtype=np.float32) * self.scale
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), _BLOCK_ROWS):
+            block = self.codes[start:start + _BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ scaled
+        return scores
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scale.nbytes
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"codes": self.codes, "scale": self.scale}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "Int8Quantizer":
+        quantizer = cls()
+        quantizer.codes = np.asarray(state["codes"], dtype=np.int8)
+        quantizer.scale = np.asarray(state["scale"], dtype=np.float32)
+        return quantizer
+
+class ProductQuantizer:
+    """Product quantization: ``num_subspaces`` slices, each coded as one of 256 k-means centroids.
+
+    A vector costs ``num_subspaces`` bytes. Queries score codes with one lookup
+    table per slice (asymmetric distance), so vectors are never decoded.
+    """
+
+    name = "pq"
+
+    def __init__(self, num_subspaces: int = 16, num_centroids: int = 256, train_size: int = 8192,
+                 iterations: int = 10, seed: int = 0):
+        self.num_subspaces = num_subspaces
+        self.num_centroids = num_centroids
+        self.train_size = train_size
+        self.iterations = iterations
+        self.seed = seed
+        self.dimension = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.codes: Optional[np.ndarray] = None
+
+    @property
+    def subspace_dim(self) -> int:
+        return math.ceil(self.dimension / self.num_subspaces)
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, d) -> (n, subspaces, subspace_dim), zero-padding d up to a multiple of the subspaces."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        padding = self.num_subspaces * self.subspace_dim - self.dimension
+        if padding:
+            vectors = np.pad(vectors, ((0, 0), (0, padding)))
+        return vectors.reshape(len(vectors), self.num_subspaces, self.subspace_dim)
+
+    def fit(self, vectors: np.ndarray) -> "ProductQuantizer":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.dimension = vectors.shape[1]
+        self.num_subspaces = max(1, min(self.num_subspaces, self.dimension))
+        rng = np.random.RandomState(self.seed)
+        sample = vectors if len(vectors) <= self.train_size else vectors[
+            np.sort(rng.choice(len(vectors), self.train_size, replace=False))
+        ]
+        parts = self._split(sample)
+        k = max(1, min(self.num_centroids, len(sample)))
+        self.centroids = np.stack([
+            _kmeans(parts[:, subspace], k, self.iterations, rng) for subspace in range(self.num_subspaces)
+        ])
+        self.codes = np.zeros((0, self.num_subspaces), dtype=np.uint8)
+        self.add(vectors)
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty((len(vectors), self.num_subspaces), dtype=np.uint8)
+        half_norms = 0.5 * np.einsum("skd,skd->sk", self.centroids, self.centroids)
+        for start in range(0, len(vectors), _BLOCK_ROWS):
+            parts = self._split(vectors[start:start + _BLOCK_ROWS])
+            for subspace in range(self.num_subspaces):
+                # Nearest centroid: argmax of x.c - |c|^2 / 2
+                affinity = parts[:, subspace] @ self.centroids[subspace].T - half_norms[subspace]
+                codes[start:start + len(parts), subspace] = affinity.argmax(axis=1)
+        return codes
+
+    def add(self, vectors: np.ndarray):
+        """Append codes for new rows with the existing centroids."""
+        self.codes = np.concatenate([self.codes, self.encode(vectors)])
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate inner products of the query with every coded row."""
+        parts = self._split(np.asarray(query, dtype=np.float32)[None, :])[0]
+        tables = np.einsum("skd,sd->sk", self.centroids, parts)
+        scores = np.zeros(len(self.codes), dtype=np.float32)
+        for subspace in range(self.num_subspaces):
+            scores += tables[subspace][self.codes[:, subspace]]
+        return scores
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.centroids.nbytes
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"codes": self.codes, "centroids": self.centroids, "dimension": np.int32(self.dimension)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "ProductQuantizer":
+        centroids = np.asarray(state["centroids"], dtype=np.float32)
+        quantizer = cls(num_subspaces=centroids.shape[0], num_centroids=centroids.shape[1])
+        quantizer.centroids = centroids
+        quantizer.dimension = int(state["dimension"])
+        # Column access per subspace: keep codes in RAM rather than strided reads off the map
+        quantizer.codes = np.ascontiguousarray(state["codes"], dtype=np.uint8)
+        return quantizer
+
+def _kmeans(points: np.ndarray, k: int, iterations: int, rng: np.random.RandomState) -> np.ndarray:
+    """Plain Lloyd's k-means, seeded with distinct sample points."""
+    centroids = points[rng.choice(len(points), k, replace=False)].copy()
+    for _ in range(iterations):
+        affinity = points @ centroids.T - 0.5 * np.einsum("kd,kd->k", centroids, centroids)
+        assignment = affinity.argmax(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        filled = counts > 0
+        # Empty clusters keep their previous centroid
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+QUANTIZERS = {"int8": Int8Quantizer, "pq": ProductQuantizer}
+
+def make_quantizer(kind: str, pq_subspaces: int = 16):
+    """A fresh quantizer for "int8" or "pq"; None for "none"."""
+    if kind == "pq":
+        return ProductQuantizer(num_subspaces=pq_subspaces)
+    if kind == "int8":
+        return Int8Quantizer()
+    return None
+
+def load_quantizer(kind: str, state: Dict[str, np.ndarray]):
+    return QUANTIZERS[kind].from_state(state)
@@ -0,0 +1,109 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class QueryCache:
+    """In-memory TTL + LRU cache for Q&A answers.
+
+    Safe to share between the event loop (cache-only lookups) and worker threads
+    running queries: every operation holds a short internal lock.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._latency_totals = {"hit": 0.0, "miss": 0.0}
+        self._latency_counts = {"hit": 0, "miss": 0}
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Normalize a question so trivially different phrasings share a key."""
+        question = re.sub(r'[^\w\s]', ' ', question.lower())
+        return re.sub(r'\s+', ' ', question).strip()
+
+    def make_key(self, question: str, user_id: Optional[str], content_id: Optional[str], version: int) -> Tuple:
+        """Build a cache key from the normalized question, scope and index version."""
+        return (self.normalize_question(question), user_id, content_id, version)
+
+    def get(self, key: Tuple, count_miss: bool = True) -> Optional[str]:
+        """Return a cached answer, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += count_miss
+                return None
+
+            expires_at, answer = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += count_miss
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return answer
+
+    def set(self, key: Tuple, answer: str):
+        """Store an answer, evicting the least recently used entries if full."""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, answer)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_scope(self, user_id: Optional[str] = None, content_id: Optional[str] = None):
+        """Drop entries for a user or content scope (stale versions are unreachable anyway)."""
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if (user_id is not None and key[1] == user_id) or (content_id is not None and key[2] == content_id)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def record_latency(self, hit: bool, seconds: float):
+        kind = "hit" if hit else "miss"
+        with self._lock:
+            self._latency_totals[kind] += seconds
+            self._latency_counts[kind] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit-rate and latency metrics."""
+        lookups = self.hits + self.misses
+
+        def avg_ms(kind: str) -> float:
+            count = self._latency_counts[kind]
+            return round(self._latency_totals[kind] / count * 1000, 3) if count else 0.0
+
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "avg_hit_latency_ms": avg_ms("hit"),
+            "avg_miss_latency_ms": avg_ms("miss"),
+        }
@@ -1,8 +1,9 @@
 import random
 import re
 from typing import List, Dict, Any
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
+
+from instrumentation import timed
+from services.text_utils import sent_tokenize, word_tokenize
 
 class QuizService:
     def __init__(self):
@@ -53,6 +54,7 @@ class QuizService:
         
         return distractors[:3]
     
+    @timed("generate_quiz")
     async def generate_quiz(self, content: str, num_questions: int = 5, difficulty: str = "medium") -> Dict[str, Any]:
         """Generate a quiz from content."""
         try:
@@ -0,0 +1,489 @@
+import bisect
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.user_files import UserFileCache, file_lock, user_file_name
+
+# Every word is indexed (stop words included) so phrases match as written
+_WORD = re.compile(r"\w+")
+_CLAUSE = re.compile(r'"([^"]*)"|(\S+)')
+
+def tokenize_spans(text: str) -> List[Tuple[str, int, int]]:
+    """Lowercased word tokens with their character offsets in ``text``."""
+    return [(match.group().lower(), match.start(), match.end()) for match in _WORD.finditer(text)]
+
+def tokenize(text: str) -> List[str]:
+    return [match.group().lower() for match in _WORD.finditer(text)]
+
+class Clause:
+    """One query clause: a word, a ``prefix*`` or a quoted phrase."""
+
+    def __init__(self, words: List[str], prefix: bool = False):
+        self.words = words
+        self.prefix = prefix
+
+    @property
+    def length(self) -> int:
+        return len(self.words)
+
+def parse_query(query: str, max_clauses: int = 16) -> List[Clause]:
+    """Split a query into clauses; every clause must match (AND)."""
+    clauses = []
+    for phrase, word in _CLAUSE.findall(query):
+        if phrase:
+            words = tokenize(phrase)
+            if words:
+                clauses.append(Clause(words))
+            continue
+        words = tokenize(word)
+        if words:
+            # Hyphenated or dotted input ("state-of-the-art") reads as a phrase
+            clauses.append(Clause(words, prefix=word.endswith("*") and len(words) == 1))
+    return clauses[:max_clauses]
+
+class Segment:
+    """An immutable positional index over a contiguous range of documents.
+
+    Terms are sorted (prefix queries bisect them); each term owns a run of
+    postings (``docs``), and each posting a run of token ``positions``.
+    """
+
+    def __init__(self, terms: List[str], term_ptr: np.ndarray, docs: np.ndarray, pos_ptr: np.ndarray,
+                 positions: np.ndarray, content_ids: List[str], lengths: np.ndarray, body_starts: np.ndarray,
+                 base: int, name: Optional[str] = None):
+        self.terms = terms
+        self.term_ptr = term_ptr
+        self.docs = docs
+        self.pos_ptr = pos_ptr
+        self.positions = positions
+        self.content_ids = content_ids
+        self.lengths = lengths
+        self.body_starts = body_starts
+        self.base = base
+        self.name = name
+        self._rows: Optional[Dict[str, int]] = None
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.content_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.term_ptr.nbytes + self.docs.nbytes + self.pos_ptr.nbytes + self.positions.nbytes
+
+    @classmethod
+    def from_document(cls, base: int, content_id: str, title: str, text: str) -> "Segment":
+        title_tokens = tokenize(title)
+        # A gap after the title keeps phrases from running into the transcript
+        body_start = len(title_tokens) + 1 if title_tokens else 0
+        tokens = title_tokens + tokenize(text)
+        terms = sorted(set(tokens))
+        rank = {term: i for i, term in enumerate(terms)}
+        ids = np.fromiter((rank[token] for token in tokens), dtype=np.int32, count=len(tokens))
+        token_positions = np.arange(len(tokens), dtype=np.int32)
+        token_positions[len(title_tokens):] += body_start - len(title_tokens)
+        order = np.argsort(ids, kind="stable")
+        counts = np.bincount(ids, minlength=len(terms))
+        return cls(
+            terms=terms,
+            term_ptr=np.arange(len(terms) + 1, dtype=np.int64),
+            docs=np.full(len(terms), base, dtype=np.int32),
+            pos_ptr=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            positions=token_positions[order],
+            content_ids=[content_id],
+            lengths=np.array([len(tokens)], dtype=np.int32),
+            body_starts=np.array([body_start], dtype=np.int32),
+            base=base,
+        )
+
+    @classmethod
+    def merge(cls, segments: Sequence["Segment"]) -> "Segment":
+        """Combine adjacent segments (in document order) into one."""
+        terms = sorted(set().union(*(segment.terms for segment in segments)))
+        rank = {term: i for i, term in enumerate(terms)}
+        term_ids, docs, tfs, starts = [], [], [], []
+        position_base = 0
+        for segment in segments:
+            segment_ranks = np.fromiter((rank[term] for term in segment.terms), dtype=np.int64, count=len(segment.terms))
+            term_ids.append(np.repeat(segment_ranks, np.diff(segment.term_ptr)))
+            docs.append(segment.docs)
+            tfs.append(np.diff(segment.pos_ptr))
+            starts.append(segment.pos_ptr[:-1] + position_base)
+            position_base += len(segment.positions)
+        term_ids = np.concatenate(term_ids)
+        # Stable: postings of one term stay in document order, since segments are in document order
+        order = np.argsort(term_ids, kind="stable")
+        tfs = np.concatenate(tfs)[order]
+        starts = np.concatenate(starts)[order]
+        pos_ptr = np.concatenate([[0], np.cumsum(tfs)]).astype(np.int64)
+        # Gather each posting's run of positions in the new order
+        gather = np.repeat(starts - pos_ptr[:-1], tfs) + np.arange(pos_ptr[-1], dtype=np.int64)
+        return cls(
+            terms=terms,
+            term_ptr=np.searchsorted(term_ids[order], np.arange(len(terms) + 1)).astype(np.int64),
+            docs=np.concatenate(docs)[order],
+            pos_ptr=pos_ptr,
+            positions=np.concatenate([segment.positions for segment in segments])[gather],
+            content_ids=[content_id for segment in segments for content_id in segment.content_ids],
+            lengths=np.concatenate([segment.lengths for segment in segments]),
+            body_starts=np.concatenate([segment.body_starts for segment in segments]),
+            base=segments[0].base,
+        )
+
+    def row(self, term: str) -> Optional[int]:
+        if self._rows is None:
+            self._rows = {term: i for i, term in enumerate(self.terms)}
+        return self._rows.get(term)
+
+    def prefix_rows(self, prefix: str, limit: int) -> range:
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\U0010ffff", lo=start)
+        return range(start, min(end, start + limit))
+
+    def postings(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Documents containing a term and its frequency in each."""
+        start, end = self.term_ptr[row], self.term_ptr[row + 1]
+        return self.docs[start:end], np.diff(self.pos_ptr[start:end + 1])
+
+    def occurrences(self, row: int, within: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sorted (doc << 32 | position) keys of a term's occurrences, optionally only in ``within`` docs."""
+        start, end = self.term_ptr[row], self.term_ptr[row + 1]
+        docs, tfs = self.postings(row)
+        if within is None:
+            positions = self.positions[self.pos_ptr[start]:self.pos_ptr[end]]
+        else:
+            keep = np.isin(docs, within, assume_unique=True)
+            docs, tfs, runs = docs[keep], tfs[keep], self.pos_ptr[start:end][keep]
+            # Gather just the kept postings' runs of positions
+            offsets = np.concatenate([[0], np.cumsum(tfs)[:-1]]).astype(np.int64) if len(tfs) else runs
+            positions = self.positions[np.repeat(runs - offsets, tfs) + np.arange(tfs.sum(), dtype=np.int64)]
+        return (np.repeat(docs.astype(np.int64), tfs) << 32) | positions.astype(np.int64)
+
+    def positions_in(self, row: int, doc: int) -> np.ndarray:
+        start, end = self.term_ptr[row], self.term_ptr[row + 1]
+        posting = start + np.searchsorted(self.docs[start:end], doc)
+        if posting >= end or self.docs[posting] != doc:
+            return np.zeros(0, dtype=np.int32)
+        return self.positions[self.pos_ptr[posting]:self.pos_ptr[posting + 1]]
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            terms=np.frombuffer("\n".join(self.terms).encode("utf-8"), dtype=np.uint8),
+            term_ptr=self.term_ptr, docs=self.docs, pos_ptr=self.pos_ptr, positions=self.positions,
+            content_ids=np.frombuffer("\n".join(self.content_ids).encode("utf-8"), dtype=np.uint8),
+            lengths=self.lengths, body_starts=self.body_starts, base=np.int64(self.base),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, name: str) -> "Segment":
+        with np.load(path) as data:
+            terms = bytes(data["terms"]).decode("utf-8")
+            return cls(
+                terms=terms.split("\n") if terms else [],
+                term_ptr=data["term_ptr"], docs=data["docs"], pos_ptr=data["pos_ptr"], positions=data["positions"],
+                content_ids=bytes(data["content_ids"]).decode("utf-8").split("\n"),
+                lengths=data["lengths"], body_starts=data["body_starts"], base=int(data["base"]), name=name,
+            )
+
+class _UserIndex:
+    """One user's segments plus document-level lookups across them."""
+
+    def __init__(self, segments: List[Segment]):
+        self.segments = segments
+        self.content_ids = {content_id for segment in segments for content_id in segment.content_ids}
+        self.num_docs = sum(segment.num_docs for segment in segments)
+        self.avgdl = float(np.mean(np.concatenate([s.lengths for s in segments]))) if self.num_docs else 1.0
+
+class DocumentHit:
+    """A ranked document, with the token spans its query clauses matched."""
+
+    def __init__(self, content_id: str, score: float, segment: Segment, doc: int):
+        self.content_id = content_id
+        self.score = score
+        self.segment = segment
+        self.doc = doc
+        # (start, end) token positions of each match in the transcript, filled for returned hits
+        self.matches: List[Tuple[int, int]] = []
+        self.title_matches: List[Tuple[int, int]] = []
+
+class SearchIndex:
+    """Per-user positional inverted index for full-text search, built incrementally at ingest.
+
+    New documents become small segments that are merged logarithmically
+    (a segment merges with its predecessor once it is as large), so a library
+    has O(log n) segments and each posting is rewritten O(log n) times. Each
+    user's segments are ``.npz`` files listed by a manifest; writers take a file
+    lock and readers reload when the manifest changes.
+    """
+
+    def __init__(self, storage_path: str = "search_index", max_users: int = 256, k1: float = 1.2,
+                 b: float = 0.75, max_expansions: int = 64):
+        self.storage_path = storage_path
+        self.max_users = max_users
+        self.k1 = k1
+        self.b = b
+        self.max_expansions = max_expansions
+        self._indexes = UserFileCache(max_users)
+        self._lock = threading.RLock()
+        os.makedirs(self.storage_path, exist_ok=True)
+
+    def _user_dir(self, user_id: Optional[str]) -> str:
+        return os.path.join(self.storage_path, user_file_name(user_id))
+
+    def _file_lock(self):
+        return file_lock(os.path.join(self.storage_path, "search_index.lock"))
+
+    def _index(self, user_id: Optional[str]) -> _UserIndex:
+        """Get a user's index, reloading it if another process changed the manifest."""
+        user_dir = self._user_dir(user_id)
+        manifest_path = os.path.join(user_dir, "manifest.json")
+
+        def load(previous: Optional[_UserIndex]) -> _UserIndex:
+            try:
+                with open(manifest_path, encoding="utf-8") as f:
+                    names = json.load(f)["segments"]
+                # Segments are immutable: keep the ones already in memory
+                loaded = {segment.name: segment for segment in previous.segments} if previous else {}
+                return _UserIndex([loaded.get(name) or Segment.load(os.path.join(user_dir, name), name)
+                                   for name in names])
+            except Exception as e:
+                print(f"Error loading search index {user_dir}: {e}")
+                return _UserIndex([])
+
+        return self._indexes.get(user_id, manifest_path, load, lambda: _UserIndex([]))
+
+    def indexed_count(self, user_id: Optional[str]) -> int:
+        with self._lock:
+            return self._index(user_id).num_docs
+
+    def add_documents(self, user_id: Optional[str], documents: Iterable[Tuple[str, str, str]]) -> int:
+        """Index (content_id, title, transcript) documents not already indexed for the user."""
+        with self._lock, self._file_lock():
+            index = self._index(user_id)
+            base = index.num_docs
+            new_segments = []
+            seen = set(index.content_ids)
+            for content_id, title, text in documents:
+                if content_id in seen:
+                    continue
+                seen.add(content_id)
+                new_segments.append(Segment.from_document(base + len(new_segments), content_id, title or "", text or ""))
+            if not new_segments:
+                return 0
+
+            segments = list(index.segments)
+            segments.append(new_segments[0] if len(new_segments) == 1 else Segment.merge(new_segments))
+            while len(segments) > 1 and segments[-2].num_docs <= segments[-1].num_docs:
+                segments[-2:] = [Segment.merge(segments[-2:])]
+            self._save(user_id, index, segments)
+            return len(new_segments)
+
+    def add_document(self, user_id: Optional[str], content_id: str, title: str, text: str) -> bool:
+        return self.add_documents(user_id, [(content_id, title, text)]) > 0
+
+    def _save(self, user_id: Optional[str], index: _UserIndex, segments: List[Segment]):
+        user_dir = self._user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        for segment in segments:
+            if segment.name is None:
+                segment.name = f"seg-{segment.base:08d}-{segment.num_docs:08d}-{os.urandom(4).hex()}.npz"
+                segment.save(os.path.join(user_dir, segment.name))
+
+        manifest_path = os.path.join(user_dir, "manifest.json")
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": [segment.name for segment in segments]}, f)
+        os.replace(tmp_path, manifest_path)
+
+        # Merged-away segments are no longer listed; readers reload from the manifest
+        live = {segment.name for segment in segments}
+        for name in os.listdir(user_dir):
+            if name.startswith("seg-") and name not in live:
+                try:
+                    os.remove(os.path.join(user_dir, name))
+                except OSError:
+                    pass
+
+        self._indexes.put(user_id, manifest_path, _UserIndex(segments))
+
+    def clear(self, user_id: Optional[str]):
+        with self._lock, self._file_lock():
+            shutil.rmtree(self._user_dir(user_id), ignore_errors=True)
+            self._indexes.pop(user_id)
+
+    def _clause_postings(self, segment: Segment, clause: Clause) -> Tuple[np.ndarray, np.ndarray]:
+        """Matching documents (sorted) and match counts for one clause within a segment."""
+        empty = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64))
+        if clause.prefix:
+            rows = segment.prefix_rows(clause.words[0], self.max_expansions)
+            if not rows:
+                return empty
+            docs = np.concatenate([segment.postings(row)[0] for row in rows])
+            tfs = np.concatenate([segment.postings(row)[1] for row in rows])
+            unique, inverse = np.unique(docs, return_inverse=True)
+            return unique, np.bincount(inverse, weights=tfs).astype(np.int64)
+
+        rows = [segment.row(word) for word in clause.words]
+        if any(row is None for row in rows):
+            return empty
+        if len(rows) == 1:
+            return segment.postings(rows[0])
+
+        # Phrase: start from the rarest word, then keep starts where every other word follows in place
+        lengths = [segment.term_ptr[row + 1] - segment.term_ptr[row] for row in rows]
+        anchor = int(np.argmin(lengths))
+        starts = segment.occurrences(rows[anchor]) - anchor
+        for offset, row in enumerate(rows):
+            if offset == anchor or not len(starts):
+                continue
+            # Filtering postings only pays off when the phrase is down to a few of this word's documents
+            within = np.unique(starts >> 32) if lengths[anchor] * 4 < lengths[offset] else None
+            keys = segment.occurrences(row, within=within)
+            found = np.searchsorted(keys, starts + offset)
+            found[found == len(keys)] = 0
+            starts = starts[keys[found] == starts + offset] if len(keys) else starts[:0]
+        if not len(starts):
+            return empty
+        docs, counts = np.unique(starts >> 32, return_counts=True)
+        return docs.astype(np.int32), counts.astype(np.int64)
+
+    def search(self, user_id: Optional[str], query: str, offset: int = 0, limit: int = 10) -> Tuple[int, List[DocumentHit]]:
+        """BM25-ranked documents matching every clause; returns (total, hits[offset:offset + limit])."""
+        clauses = parse_query(query)
+        with self._lock:
+            index = self._index(user_id)
+        if not clauses or not index.num_docs:
+            return 0, []
+
+        per_segment = []
+        doc_freq = np.zeros(len(clauses), dtype=np.float64)
+        for segment in index.segments:
+            matches = [self._clause_postings(segment, clause) for clause in clauses]
+            for i, (docs, _) in enumerate(matches):
+                doc_freq[i] += len(docs)
+            per_segment.append(matches)
+        idf = np.log(1 + (index.num_docs - doc_freq + 0.5) / (doc_freq + 0.5)) * [clause.length for clause in clauses]
+
+        all_docs, all_scores = [], []
+        for segment, matches in zip(index.segments, per_segment):
+            docs = matches[0][0]
+            for other, _ in matches[1:]:
+                docs = np.intersect1d(docs, other, assume_unique=True)
+            if not len(docs):
+                continue
+            lengths = segment.lengths[docs - segment.base].astype(np.float64)
+            norm = self.k1 * (1 - self.b + self.b * lengths / index.avgdl)
+            scores = np.zeros(len(docs), dtype=np.float64)
+            for weight, (clause_docs, tfs) in zip(idf, matches):
+                tf = tfs[np.searchsorted(clause_docs, docs)].astype(np.float64)
+                scores += weight * tf * (self.k1 + 1) / (tf + norm)
+            all_docs.append(docs)
+            all_scores.append(scores)
+
+        if not all_docs:
+            return 0, []
+        docs = np.concatenate(all_docs)
+        scores = np.concatenate(all_scores)
+        total = len(docs)
+
+        needed = min(total, offset + limit)
+        if needed <= offset:
+            return total, []
+        top = np.argpartition(-scores, needed - 1)[:needed] if needed < total else np.arange(total)
+        # Newest first among equal scores
+        top = top[np.lexsort((-docs[top], -scores[top]))][offset:needed]
+
+        segment_of = self._segment_lookup(index)
+        hits = []
+        for i in top:
+            doc = int(docs[i])
+            segment = segment_of(doc)
+            hit = DocumentHit(segment.content_ids[doc - segment.base], float(scores[i]), segment, doc)
+            self._locate(hit, clauses)
+            hits.append(hit)
+        return total, hits
+
+    @staticmethod
+    def _segment_lookup(index: _UserIndex):
+        bases = [segment.base for segment in index.segments]
+        return lambda doc: index.segments[bisect.bisect_right(bases, doc) - 1]
+
+    def _locate(self, hit: DocumentHit, clauses: List[Clause]):
+        """Token spans of every clause match in one document, split into title and transcript."""
+        segment, doc = hit.segment, hit.doc
+        body_start = int(segment.body_starts[doc - segment.base])
+        spans = []
+        for clause in clauses:
+            if clause.prefix:
+                for row in segment.prefix_rows(clause.words[0], self.max_expansions):
+                    spans.extend((int(p), int(p)) for p in segment.positions_in(row, doc))
+                continue
+            rows = [segment.row(word) for word in clause.words]
+            starts = segment.positions_in(rows[0], doc)
+            for offset, row in enumerate(rows[1:], 1):
+                starts = starts[np.isin(starts + offset, segment.positions_in(row, doc))]
+            spans.extend((int(p), int(p) + clause.length - 1) for p in starts)
+        spans.sort()
+        hit.title_matches = [span for span in spans if span[0] < body_start]
+        hit.matches = [(start - body_start, end - body_start) for start, end in spans if start >= body_start]
+
+    def stats(self, user_id: Optional[str]) -> Dict[str, int]:
+        with self._lock:
+            index = self._index(user_id)
+            return {
+                "documents": index.num_docs,
+                "segments": len(index.segments),
+                "bytes": sum(segment.nbytes for segment in index.segments),
+            }
+
+def build_snippets(text: str, matches: List[Tuple[int, int]], window: int = 12,
+                   max_snippets: int = 3) -> List[Dict[str, object]]:
+    """Snippets of ``text`` around token-span matches, with character offsets and highlights.
+
+    Each snippet's ``start``/``end`` are offsets into ``text``; ``highlights``
+    are (start, end) offsets relative to the snippet.
+    """
+    if not matches:
+        return []
+    tokens = tokenize_spans(text)
+    if not tokens:
+        return []
+    last = len(tokens) - 1
+    snippets = []
+    current = None
+    for start, end in matches:
+        start, end = min(start, last), min(end, last)
+        if current is not None and start <= current["last"] + window:
+            current["last"] = max(current["last"], end + window)
+            current["spans"].append((start, end))
+            continue
+        if len(snippets) >= max_snippets:
+            break
+        current = {"first": max(0, start - window), "last": end + window, "spans": [(start, end)]}
+        snippets.append(current)
+
+    results = []
+    for snippet in snippets:
+        first, last_token = snippet["first"], min(snippet["last"], last)
+        char_start, char_end = tokens[first][1], tokens[last_token][2]
+        results.append({
+            "text": text[char_start:char_end],
+            "start": char_start,
+            "end": char_end,
+            "highlights": [(tokens[s][1] - char_start, tokens[e][2] - char_start) for s, e in snippet["spans"]],
+        })
+    return results
+
+def match_offsets(text: str, matches: List[Tuple[int, int]], limit: int = 50) -> List[Tuple[int, int]]:
+    """Character (start, end) offsets in ``text`` of token-span matches."""
+    tokens = tokenize_spans(text)
+    return [(tokens[start][1], tokens[end][2]) for start, end in matches[:limit] if end < len(tokens)]
@@ -0,0 +1,115 @@
+import heapq
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.user_files import UserFileCache, file_lock, user_file_name
+
+class _UserTable:
+    """Document frequencies for one user's library."""
+
+    def __init__(self):
+        self.num_docs = 0
+        self.df: Dict[str, int] = {}
+        self.content_ids: Set[str] = set()
+
+class TermStatistics:
+    """Per-user document-frequency tables, updated as content is ingested.
+
+    Each user's table is one ``.npz`` file: the terms as a single newline-joined
+    UTF-8 buffer plus a uint32 count array, so a library with tens of thousands
+    of distinct terms costs a few hundred KB on disk. Updates take a file lock
+    and re-read a table another worker changed, so counts aren't lost across
+    uvicorn workers.
+    """
+
+    def __init__(self, storage_path: str = "term_stats", max_users: int = 1024):
+        self.storage_path = storage_path
+        self.max_users = max_users
+        self._tables = UserFileCache(max_users)
+        self._lock = threading.RLock()
+        os.makedirs(self.storage_path, exist_ok=True)
+
+    def _path(self, user_id: Optional[str]) -> str:
+        return os.path.join(self.storage_path, f"{user_file_name(user_id)}.npz")
+
+    def _file_lock(self):
+        return file_lock(os.path.join(self.storage_path, "term_stats.lock"))
+
+    def _table(self, user_id: Optional[str]) -> _UserTable:
+        """Get a user's table, reloading it if another process rewrote the file."""
+        path = self._path(user_id)
+        return self._tables.get(user_id, path, lambda previous: self._load(path), _UserTable)
+
+    def _load(self, path: str) -> _UserTable:
+        table = _UserTable()
+        try:
+            with np.load(path) as data:
+                terms = bytes(data["terms"]).decode("utf-8").split("\n") if data["terms"].size else []
+                table.df = dict(zip(terms, data["counts"].tolist()))
+                table.num_docs = int(data["num_docs"])
+                ids = bytes(data["content_ids"]).decode("utf-8")
+                table.content_ids = set(ids.split("\n")) if ids else set()
+        except Exception as e:
+            print(f"Error loading term statistics {path}: {e}")
+        return table
+
+    def _save(self, user_id: Optional[str], table: _UserTable):
+        path = self._path(user_id)
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            terms=np.frombuffer("\n".join(table.df).encode("utf-8"), dtype=np.uint8),
+            counts=np.fromiter(table.df.values(), dtype=np.uint32, count=len(table.df)),
+            num_docs=np.uint32(table.num_docs),
+            content_ids=np.frombuffer("\n".join(table.content_ids).encode("utf-8"), dtype=np.uint8),
+        )
+        os.replace(tmp_path, path)
+        self._tables.put(user_id, path, table)
+
+    def add_documents(self, user_id: Optional[str], documents: Iterable[Tuple[str, str]]) -> int:
+        """Count each (content_id, text) once towards the user's document frequencies."""
+        from services.hybrid_retrieval import tokenize
+
+        with self._lock, self._file_lock():
+            table = self._table(user_id)
+            added = 0
+            for content_id, text in documents:
+                if content_id in table.content_ids:
+                    continue
+                for term in set(tokenize(text)):
+                    table.df[term] = table.df.get(term, 0) + 1
+                table.content_ids.add(content_id)
+                table.num_docs += 1
+                added += 1
+            if added:
+                self._save(user_id, table)
+            return added
+
+    def add_document(self, user_id: Optional[str], content_id: str, text: str) -> bool:
+        """Record one ingested document; returns False if it was already counted."""
+        return self.add_documents(user_id, [(content_id, text)]) > 0
+
+    def idf(self, user_id: Optional[str], terms: List[str]) -> np.ndarray:
+        """Smoothed IDF (scikit-learn's formula) of each term against the user's library."""
+        with self._lock:
+            table = self._table(user_id)
+            df = np.fromiter((table.df.get(term, 0) for term in terms), dtype=np.float64, count=len(terms))
+            num_docs = table.num_docs
+        return np.log((1 + num_docs) / (1 + df)) + 1
+
+    def stats(self, user_id: Optional[str]) -> Dict[str, int]:
+        with self._lock:
+            table = self._table(user_id)
+            return {"documents": table.num_docs, "terms": len(table.df)}
+
+def top_keywords(counts: Dict[str, int], idf: np.ndarray, k: int) -> List[str]:
+    """Top-k terms by tf * idf with a bounded heap, without sorting every term."""
+    if not counts or k <= 0:
+        return []
+    terms = list(counts)
+    scores = np.fromiter(counts.values(), dtype=np.float64, count=len(terms)) * idf
+    # Ties keep first-occurrence order, so results are stable across runs
+    return [terms[i] for i in heapq.nlargest(k, range(len(terms)), key=scores.__getitem__)]
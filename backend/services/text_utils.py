@@ -0,0 +1,82 @@
+import os
+import re
+from typing import Dict, List, Set
+
+# NLTK resources used by the services, keyed by download package name
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+}
+
+# Bundled data directory, searched before the NLTK defaults
+NLTK_DATA_DIR = os.getenv(
+    "NLTK_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nltk_data")
+)
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+_nltk_status: Dict[str, bool] = {}
+_stop_words: Set[str] = set()
+
+def _nltk():
+    """Import NLTK on first use, registering the bundled data directory."""
+    import nltk
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return nltk
+
+def check_nltk_data(download: bool = False) -> Dict[str, bool]:
+    """Preflight check of NLTK data; optionally download what is missing into NLTK_DATA_DIR."""
+    nltk = _nltk()
+    status = {}
+    for package, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+            status[package] = True
+        except LookupError:
+            if download:
+                os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+                status[package] = bool(nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True))
+            else:
+                status[package] = False
+    _nltk_status.update(status)
+    return status
+
+def _has(package: str) -> bool:
+    if package not in _nltk_status:
+        check_nltk_data()
+    return _nltk_status.get(package, False)
+
+def sent_tokenize(text: str) -> List[str]:
+    """Split sentences with NLTK punkt, or a regex fallback when punkt data is missing."""
+    if _has('punkt_tab') or _has('punkt'):
+        try:
+            from nltk.tokenize import sent_tokenize as nltk_sent_tokenize
+            return nltk_sent_tokenize(text)
+        except LookupError:
+            pass
+    return [sentence for sentence in _SENTENCE_SPLIT.split(text.strip()) if sentence]
+
+def word_tokenize(text: str) -> List[str]:
+    """Tokenize words with NLTK, or a regex fallback when punkt data is missing."""
+    if _has('punkt_tab') or _has('punkt'):
+        try:
+            from nltk.tokenize import word_tokenize as nltk_word_tokenize
+            return nltk_word_tokenize(text)
+        except LookupError:
+            pass
+    return _WORD.findall(text)
+
+def stop_words() -> Set[str]:
+    """English stop words from NLTK, falling back to scikit-learn's list."""
+    if not _stop_words:
+        if _has('stopwords'):
+            from nltk.corpus import stopwords
+            _stop_words.update(stopwords.words('english'))
+        else:
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            _stop_words.update(ENGLISH_STOP_WORDS)
+    return _stop_words
@@ -1,6 +1,8 @@
 from deep_translator import GoogleTranslator
 from typing import Dict
 
+from instrumentation import timed
+
 class TranslationService:
     def __init__(self):
         self.supported_languages = {
@@ -17,6 +19,7 @@ class TranslationService:
             'hi': 'Hindi'
         }
     
+    @timed("translate_text")
     async def translate_text(self, text: str, target_language: str) -> str:
         """Translate text to target language."""
         try:
@@ -0,0 +1,61 @@
+import fcntl
+import hashlib
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, Tuple
+
+def user_file_name(user_id: Optional[str]) -> str:
+    """A safe file name for an opaque user id."""
+    return hashlib.blake2b(str(user_id).encode("utf-8"), digest_size=12).hexdigest()
+
+def file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """A key that changes whenever ``path`` is rewritten or replaced, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on ``path``, shared by every worker process."""
+    with open(path, "a+") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+class UserFileCache:
+    """LRU of per-user data loaded from disk, reloaded when another process rewrites its file.
+
+    Not thread-safe on its own; callers hold their own lock around it.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._entries: "OrderedDict[Optional[str], Tuple[Any, Any]]" = OrderedDict()
+
+    def get(self, user_id: Optional[str], path: str, load: Callable[[Any], Any], empty: Callable[[], Any]) -> Any:
+        """The user's cached value, or ``load(previous)`` if ``path`` changed (``empty()`` if it's gone)."""
+        key = file_version(path)
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != key:
+            value = load(entry[1] if entry else None) if key is not None else empty()
+            entry = (key, value)
+        self._store(user_id, entry)
+        return entry[1]
+
+    def put(self, user_id: Optional[str], path: str, value: Any):
+        """Cache a value this process just wrote to ``path``."""
+        self._store(user_id, (file_version(path), value))
+
+    def pop(self, user_id: Optional[str]):
+        self._entries.pop(user_id, None)
+
+    def _store(self, user_id: Optional[str], entry: Tuple[Any, Any]):
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
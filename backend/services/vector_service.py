@@ -1,93 +1,276 @@
+import copy
 import json
 import os
-from typing import List, Dict, Any
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from instrumentation import timed
+from services.hybrid_retrieval import BM25Index, HybridRetriever, LsaEncoder, SentenceEncoder
+from services.index_store import IndexSnapshotStore
+from services.quantization import load_quantizer, make_quantizer
+from services.query_cache import QueryCache
+
+class _IndexState:
+    """One consistent version of the index: documents, TF-IDF fit, dense vectors and codes.
+    
+    A new state is built off to the side and swapped in with a single assignment,
+    so a query ranks against the state it started with, whatever is published meanwhile.
+    """
+    
+    def __init__(self, documents: Optional[Dict[str, Any]] = None, vectorizer=None, vectors=None):
+        self.documents = documents if documents is not None else {}
+        self.vectorizer = vectorizer
+        self.vectors = vectors
+        self.fitted = vectorizer is not None and vectors is not None
+        self.encoder = None
+        self.dense_vectors = None
+        self.dense_ids: List[str] = []
+        self.quantizer = None
+        # BM25 and per-owner row lookups, built by the first query against this state
+        self.retriever = None
+        self.doc_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.owner_rows: Dict[Optional[str], np.ndarray] = {}
+        self.lock = threading.Lock()
+
+def _state_attribute(name: str) -> property:
+    return property(lambda self: getattr(self._state, name), doc=f"``{name}`` of the current index state.")
 
 class VectorService:
-    def __init__(self):
-        self.storage_path = "vector_storage"
-        self.vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
-        self.documents = {}
-        self.vectors = None
-        self.fitted = False
+    documents = _state_attribute("documents")
+    vectorizer = _state_attribute("vectorizer")
+    vectors = _state_attribute("vectors")
+    fitted = _state_attribute("fitted")
+    encoder = _state_attribute("encoder")
+    dense_vectors = _state_attribute("dense_vectors")
+    quantizer = _state_attribute("quantizer")
+    
+    def __init__(self, cache_max_entries: int = 1024, cache_ttl_seconds: float = 300.0,
+                 storage_path: str = "vector_storage", dense_encoder: str = "lsa",
+                 retrieval_budget_ms: float = 100.0, compression: str = "none", pq_subspaces: int = 16,
+                 sparse_max_terms: int = 0, rescore_candidates: int = 100):
+        self.storage_path = storage_path
+        self._state = _IndexState()
+        self.loaded = False
+        self._load_lock = threading.RLock()
+        # Queries read whichever state is current without locking; this lock only serializes
+        # swapping in a new state with its snapshot version and cache scope versions
+        self._index_lock = threading.RLock()
+        
+        # Hybrid retrieval: BM25 (rebuilt lazily) + dense vectors ("lsa", "sentence-transformers" or "none")
+        self.dense_encoder_name = dense_encoder
+        self.retrieval_budget_ms = retrieval_budget_ms
+        
+        # Compressed index ("none", "int8" or "pq"): first-pass search on dense codes and
+        # float16 (optionally pruned) BM25 postings, with exact re-scoring of the top candidates
+        self.compression = compression
+        self.pq_subspaces = pq_subspaces
+        self.sparse_max_terms = sparse_max_terms
+        self.rescore_candidates = rescore_candidates
+        
+        # Answer cache, invalidated through per-scope index versions
+        self.cache = QueryCache(max_entries=cache_max_entries, ttl_seconds=cache_ttl_seconds)
+        self.index_version = 0
+        self.scope_versions: Dict[str, int] = {}
+        # Version of scopes not bumped since the last reset
+        self.reset_version = 0
         
         # Create storage directory
         os.makedirs(self.storage_path, exist_ok=True)
         
-        # Load existing data
-        self.load_data()
+        # Versioned snapshots shared by every worker using this storage path
+        self.store = IndexSnapshotStore(self.storage_path)
+        self.snapshot_version = 0
+        
+        # Existing data is loaded on first use (or by warm-up), not at construction
+    
+    def _new_vectorizer(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        return TfidfVectorizer(stop_words='english', max_features=1000)
+    
+    def ensure_loaded(self):
+        """Load the stored index once, then pick up snapshots published by other workers."""
+        if self.loaded:
+            self.refresh()
+            return
+        with self._load_lock:
+            if not self.loaded:
+                self.load_data()
+                self.loaded = True
+    
+    def refresh(self):
+        """Hot-reload the index if a newer snapshot has been published."""
+        latest = self.store.current_version()
+        if latest > self.snapshot_version:
+            with self._index_lock:
+                if latest > self.snapshot_version:
+                    try:
+                        self._apply_latest(latest)
+                    except Exception as e:
+                        # Keep serving the current index; the next call retries
+                        print(f"Error reloading vector snapshot {latest}: {e}")
     
     def load_data(self):
         """Load existing vector data."""
         try:
-            docs_path = os.path.join(self.storage_path, "documents.json")
-            vectors_path = os.path.join(self.storage_path, "vectors.npy")
-            vectorizer_path = os.path.join(self.storage_path, "vectorizer.json")
+            latest = self.store.current_version()
+            if latest:
+                self._apply_latest(latest)
+                return
             
+            # Migrate the legacy single-process layout by refitting its documents
+            docs_path = os.path.join(self.storage_path, "documents.json")
             if os.path.exists(docs_path):
                 with open(docs_path, 'r', encoding='utf-8') as f:
-                    self.documents = json.load(f)
-            
-            if os.path.exists(vectors_path) and os.path.exists(vectorizer_path):
-                self.vectors = np.load(vectors_path)
-                
-                # Load vectorizer vocabulary
-                with open(vectorizer_path, 'r', encoding='utf-8') as f:
-                    vectorizer_data = json.load(f)
-                    self.vectorizer.vocabulary_ = vectorizer_data.get('vocabulary', {})
-                    self.fitted = True
+                    documents = json.load(f)
+                self._state = self._fit_state(documents)
                     
         except Exception as e:
             print(f"Error loading vector data: {e}")
-            self.documents = {}
-            self.vectors = None
-            self.fitted = False
+            self._state = _IndexState()
     
-    def save_data(self):
-        """Save vector data to disk."""
-        try:
-            docs_path = os.path.join(self.storage_path, "documents.json")
-            vectors_path = os.path.join(self.storage_path, "vectors.npy")
-            vectorizer_path = os.path.join(self.storage_path, "vectorizer.json")
-            
-            # Save documents
-            with open(docs_path, 'w', encoding='utf-8') as f:
-                json.dump(self.documents, f, ensure_ascii=False, indent=2)
-            
-            # Save vectors
-            if self.vectors is not None:
-                np.save(vectors_path, self.vectors)
+    def _apply_latest(self, version: int, attempts: int = 3):
+        """Apply ``version``, or a newer one if a burst of writes pruned it before it was read."""
+        for attempt in range(attempts):
+            try:
+                self.apply_snapshot(version)
+                return
+            except FileNotFoundError:
+                latest = self.store.current_version()
+                if latest <= version or attempt == attempts - 1:
+                    raise
+                version = latest
+    
+    def apply_snapshot(self, version: int):
+        """Swap in a published snapshot and invalidate cached answers it affects."""
+        snapshot = self.store.read(version)
+        state = _IndexState(snapshot['documents'])
+        if snapshot['vectors'] is not None:
+            vectorizer = self._new_vectorizer()
+            vectorizer.vocabulary_ = snapshot['vocabulary']
+            vectorizer.idf_ = snapshot['idf']
+            state = _IndexState(snapshot['documents'], vectorizer, snapshot['vectors'])
+        self._load_dense(state, snapshot['extras'])
+        
+        with self._index_lock:
+            previous = self.snapshot_version
+            self._state = state
+            self.snapshot_version = version
             
-            # Save vectorizer
-            if self.fitted:
-                vectorizer_data = {
-                    'vocabulary': self.vectorizer.vocabulary_
-                }
-                with open(vectorizer_path, 'w', encoding='utf-8') as f:
-                    json.dump(vectorizer_data, f, indent=2)
+            # Versions advance after the swap, so an answer cached under a new version never comes from the old state
+            scopes = snapshot['meta'].get('scopes')
+            if previous and version == previous + 1 and scopes is not None:
+                for scope in scopes:
+                    self.bump_scope(scope.get('user_id'), scope.get('content_id'))
+            elif previous:
+                # Several writes (or a bulk import) happened elsewhere; drop everything rather than replay them
+                self.reset_scopes()
+    
+    @timed("save_data")
+    def save_data(self, scopes: Optional[List[Dict[str, Any]]] = None, state: Optional[_IndexState] = None):
+        """Publish an index state (by default the current one) as a new snapshot and make it current."""
+        state = state if state is not None else self._state
+        version = self.snapshot_version
+        try:
+            with self.store.lock():
+                version = self.store.write(
+                    state.documents,
+                    state.vectorizer.vocabulary_ if state.fitted else None,
+                    state.vectorizer.idf_ if state.fitted else None,
+                    state.vectors if state.fitted else None,
+                    meta={'scopes': scopes, 'dense_encoder': self.dense_encoder_name},
+                    extras={
+                        'dense': state.dense_vectors,
+                        'lsa_components': state.encoder.components if isinstance(state.encoder, LsaEncoder) else None,
+                        **{f'quant_{name}': array for name, array in
+                           (state.quantizer.state() if state.quantizer is not None else {}).items()},
+                    }
+                )
+                if state.quantizer is not None and state.dense_vectors is not None:
+                    # Full-precision rows are only read to re-score candidates: serve them from the snapshot's map
+                    state.dense_vectors = self.store.read_extra(version, 'dense')
+                    if state.retriever is not None:
+                        state.retriever.dense_vectors = state.dense_vectors
                     
         except Exception as e:
             print(f"Error saving vector data: {e}")
+        
+        with self._index_lock:
+            self._state = state
+            self.snapshot_version = version
+    
+    def bump_scope(self, user_id: Optional[str] = None, content_id: Optional[str] = None):
+        """Advance the index version for the scopes touched by a write."""
+        self.index_version += 1
+        for scope in (f"user:{user_id}" if user_id else None, f"content:{content_id}" if content_id else None):
+            if scope:
+                self.scope_versions[scope] = self.index_version
+        self.cache.invalidate_scope(user_id=user_id, content_id=content_id)
     
-    async def store_content(self, content_id: str, transcript: str, summary: str):
+    def reset_scopes(self):
+        """Invalidate every cached answer, e.g. after a bulk import."""
+        self.index_version += 1
+        # Keys built before the reset stay unreachable even if their answers are stored after it
+        self.reset_version = self.index_version
+        self.scope_versions.clear()
+        self.cache.clear()
+    
+    def scope_version(self, user_id: Optional[str] = None, content_id: Optional[str] = None) -> int:
+        """Get the index version that answers for this scope depend on."""
+        if content_id:
+            return self.scope_versions.get(f"content:{content_id}", self.reset_version)
+        if user_id:
+            return self.scope_versions.get(f"user:{user_id}", self.reset_version)
+        return self.index_version
+    
+    async def store_content(self, content_id: str, transcript: str, summary: str, user_id: Optional[str] = None):
         """Store content in vector database."""
+        self.store_many([(content_id, transcript, summary)], user_id=user_id)
+    
+    def store_many(self, items: List[Tuple[str, str, str]], user_id: Optional[str] = None):
+        """Store (content_id, transcript, summary) items with a single refit and snapshot."""
+        if not items:
+            return
+        self.ensure_loaded()
         try:
-            # Combine transcript and summary for better retrieval
-            combined_text = f"{summary}\n\n{transcript}"
-            
-            self.documents[content_id] = {
-                'transcript': transcript,
-                'summary': summary,
-                'combined_text': combined_text
-            }
-            
-            # Rebuild vectors with all documents
-            self.rebuild_vectors()
-            
-            # Save to disk
-            self.save_data()
+            # Writes are serialized across workers (and threads); start from the latest
+            # snapshot so another worker's documents aren't lost. Queries keep using the
+            # current state during the refit; only the swap takes the index lock.
+            with self.store.lock():
+                self.refresh()
+                previous = self._state
+                # Queries may still be reading the current state: build the next one from a copy
+                documents = dict(previous.documents)
+                extend = True
+                for content_id, transcript, summary in items:
+                    if content_id in documents:
+                        # Replaced in place: dense rows can't be extended incrementally
+                        extend = False
+                    
+                    # Combine transcript and summary for better retrieval
+                    documents[content_id] = {
+                        'transcript': transcript,
+                        'summary': summary,
+                        'combined_text': f"{summary}\n\n{transcript}",
+                        'user_id': user_id
+                    }
+                
+                # Rebuild vectors with all documents
+                state = self._fit_state(documents, previous, extend=extend)
+                
+                # Too many scopes to replay one by one; every worker drops its cache instead
+                scopes = [{'user_id': user_id, 'content_id': items[0][0]}] if len(items) == 1 else None
+                
+                # Save to disk and swap the new state in
+                self.save_data(scopes=scopes, state=state)
+                
+                with self._index_lock:
+                    if scopes is not None:
+                        self.bump_scope(user_id, items[0][0])
+                    else:
+                        self.reset_scopes()
             
         except Exception as e:
             print(f"Error storing content: {e}")
@@ -98,43 +281,222 @@ class VectorService:
             return
         
         try:
-            texts = [doc['combined_text'] for doc in self.documents.values()]
-            self.vectors = self.vectorizer.fit_transform(texts)
-            self.fitted = True
+            self._state = self._fit_state(self.documents, self._state)
             
         except Exception as e:
             print(f"Error rebuilding vectors: {e}")
     
-    async def query(self, question: str, user_id: str = None) -> str:
+    @timed("rebuild_vectors")
+    def _fit_state(self, documents: Dict[str, Any], previous: Optional[_IndexState] = None,
+                   extend: bool = True) -> _IndexState:
+        """Fit a new index state for ``documents``; ``previous`` is only read, never changed."""
+        texts = [doc['combined_text'] for doc in documents.values()]
+        vectorizer = self._new_vectorizer()
+        vectors = vectorizer.fit_transform(texts)
+        state = _IndexState(documents, vectorizer, vectors)
+        self._fit_dense(state, texts, previous, extend)
+        return state
+    
+    def _fit_dense(self, state: _IndexState, texts: List[str], previous: Optional[_IndexState], extend: bool):
+        """Fit, or extend from the previous state, the dense document vectors after the TF-IDF refit."""
+        doc_ids = list(state.documents.keys())
+        known = len(previous.dense_ids) if previous is not None and extend else 0
+        extended = False
+        if self.dense_encoder_name == "lsa":
+            state.encoder = LsaEncoder.fit(state.vectorizer, state.vectors)
+            state.dense_vectors = state.encoder.encode_matrix(state.vectors) if state.encoder else None
+        elif self.dense_encoder_name == "sentence-transformers":
+            reuse = previous is not None and isinstance(previous.encoder, SentenceEncoder)
+            state.encoder = previous.encoder if reuse else SentenceEncoder()
+            # Embeddings don't depend on the rest of the corpus: only encode new documents
+            if known and previous.dense_vectors is not None and doc_ids[:known] == previous.dense_ids:
+                extended = True
+                state.dense_vectors = previous.dense_vectors
+                if len(texts) > known:
+                    state.dense_vectors = np.vstack([state.dense_vectors, state.encoder.encode_documents(texts[known:])])
+            else:
+                state.dense_vectors = state.encoder.encode_documents(texts)
+        state.dense_ids = doc_ids if state.dense_vectors is not None else []
+        
+        if state.dense_vectors is None or self.compression == "none":
+            state.quantizer = None
+        elif extended and previous.quantizer is not None and len(previous.quantizer.codes) == known:
+            # Same embedding space: code only the new rows, on a copy the previous state doesn't share
+            state.quantizer = copy.copy(previous.quantizer)
+            state.quantizer.add(state.dense_vectors[known:])
+        else:
+            state.quantizer = make_quantizer(self.compression, self.pq_subspaces).fit(state.dense_vectors)
+    
+    def _load_dense(self, state: _IndexState, extras: Dict[str, Any]):
+        """Restore the dense encoder and vectors from snapshot arrays."""
+        state.dense_vectors = extras.get('dense')
+        if state.dense_vectors is not None and 'lsa_components' in extras and state.fitted:
+            state.encoder = LsaEncoder(state.vectorizer, extras['lsa_components'])
+        elif state.dense_vectors is not None and self.dense_encoder_name == "sentence-transformers":
+            state.encoder = SentenceEncoder()
+        else:
+            state.encoder = None
+            state.dense_vectors = None
+        state.dense_ids = list(state.documents.keys()) if state.dense_vectors is not None else []
+        
+        state.quantizer = None
+        if state.dense_vectors is not None and self.compression != "none":
+            codes = {name[len('quant_'):]: array for name, array in extras.items() if name.startswith('quant_')}
+            stored = 'pq' if 'centroids' in codes else 'int8' if 'scale' in codes else None
+            if stored == self.compression and len(codes['codes']) == len(state.dense_vectors):
+                state.quantizer = load_quantizer(stored, codes)
+            else:
+                # Snapshot written without (or with other) codes: quantize it here
+                state.quantizer = make_quantizer(self.compression, self.pq_subspaces).fit(state.dense_vectors)
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes held in RAM by the retrieval index (memory-mapped snapshot arrays excluded)."""
+        def resident(array):
+            return 0 if array is None or isinstance(array, np.memmap) else array.nbytes
+        
+        state = self._state
+        retriever = state.retriever
+        return {
+            'dense_vectors': resident(state.dense_vectors),
+            'dense_codes': state.quantizer.nbytes if state.quantizer is not None else 0,
+            'bm25_postings': retriever.bm25.nbytes if retriever is not None else 0,
+        }
+    
+    def _get_retriever(self, state: _IndexState) -> HybridRetriever:
+        """Build (once per index state) the BM25 index and per-owner row lookups."""
+        if state.retriever is None:
+            with state.lock:
+                if state.retriever is None:
+                    doc_ids = list(state.documents.keys())
+                    owners: Dict[Optional[str], List[int]] = {}
+                    for i, document in enumerate(state.documents.values()):
+                        owners.setdefault(document.get('user_id'), []).append(i)
+                    
+                    bm25 = BM25Index(
+                        compress=self.compression != "none",
+                        max_terms=self.sparse_max_terms if self.compression != "none" else 0
+                    ).build([doc['combined_text'] for doc in state.documents.values()])
+                    retriever = HybridRetriever(
+                        bm25,
+                        encoder=state.encoder,
+                        dense_vectors=state.dense_vectors,
+                        budget_ms=self.retrieval_budget_ms,
+                        dense_codes=state.quantizer,
+                        rescore_candidates=self.rescore_candidates
+                    )
+                    state.doc_ids = doc_ids
+                    state.positions = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+                    state.owner_rows = {owner: np.array(rows, dtype=np.int64) for owner, rows in owners.items()}
+                    state.retriever = retriever
+        return state.retriever
+    
+    def candidate_mask(self, user_id: Optional[str] = None, content_id: Optional[str] = None,
+                       state: Optional[_IndexState] = None) -> np.ndarray:
+        """Rows visible to a user (plus legacy unowned rows), optionally narrowed to one content item."""
+        state = state if state is not None else self._state
+        self._get_retriever(state)
+        mask = np.zeros(len(state.doc_ids), dtype=bool)
+        if content_id:
+            row = state.positions.get(content_id)
+            if row is not None:
+                owner = state.documents[content_id].get('user_id')
+                mask[row] = not (user_id and owner and owner != user_id)
+            return mask
+        if not user_id:
+            mask[:] = True
+            return mask
+        for owner in (user_id, None):
+            rows = state.owner_rows.get(owner)
+            if rows is not None:
+                mask[rows] = True
+        return mask
+    
+    def search(self, question: str, user_id: Optional[str] = None, content_id: Optional[str] = None,
+               k: int = 5) -> List[Dict[str, Any]]:
+        """Rank the visible documents for a question with hybrid retrieval."""
+        self.ensure_loaded()
+        return self._search(self._state, question, user_id, content_id, k)
+    
+    def _search(self, state: _IndexState, question: str, user_id: Optional[str], content_id: Optional[str],
+                k: int) -> List[Dict[str, Any]]:
+        if not state.documents or not state.fitted:
+            return []
+        
+        retriever = self._get_retriever(state)
+        mask = self.candidate_mask(user_id, content_id, state)
+        if not mask.any():
+            return []
+        
+        documents = state.documents
+        doc_ids = state.doc_ids
+        results = retriever.search(
+            question,
+            k=k,
+            mask=mask,
+            get_text=lambda row: documents[doc_ids[row]]['combined_text']
+        )
+        return [{'content_id': doc_ids[row], 'score': score} for row, score in results]
+    
+    def cached_answer(self, question: str, user_id: str = None, content_id: Optional[str] = None) -> Optional[str]:
+        """Answer from the cache without running retrieval; None on a miss.
+        
+        Cheap enough for the event loop: one stat and no index lock. When another worker
+        has published a newer snapshot this is a miss, so query() reloads off the loop.
+        """
+        if not self.loaded or self.store.current_version() > self.snapshot_version:
+            return None
+        start = time.perf_counter()
+        key = self.cache.make_key(question, user_id, content_id, self.scope_version(user_id, content_id))
+        # A miss is counted by the query() that follows
+        cached = self.cache.get(key, count_miss=False)
+        if cached is not None:
+            self.cache.record_latency(True, time.perf_counter() - start)
+        return cached
+    
+    @timed("query")
+    async def query(self, question: str, user_id: str = None, content_id: Optional[str] = None) -> str:
         """Query the vector database for relevant content."""
+        start = time.perf_counter()
+        self.ensure_loaded()
+        # Key first, then the state: writers swap the state before advancing versions, so an
+        # answer from an older state can only land under a key that is no longer current
+        key = self.cache.make_key(question, user_id, content_id, self.scope_version(user_id, content_id))
+        state = self._state
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.record_latency(True, time.perf_counter() - start)
+            return cached
+        
+        answer, cacheable = self._answer(question, user_id, content_id, state)
+        if cacheable:
+            self.cache.set(key, answer)
+        self.cache.record_latency(False, time.perf_counter() - start)
+        return answer
+    
+    def _answer(self, question: str, user_id: Optional[str], content_id: Optional[str], state: _IndexState):
+        """Run retrieval and answer generation against one index state; returns (answer, cacheable)."""
         try:
-            if not self.documents or not self.fitted:
-                return "I don't have enough information to answer your question. Please upload some content first."
-            
-            # Vectorize the question
-            question_vector = self.vectorizer.transform([question])
-            
-            # Calculate similarities
-            similarities = cosine_similarity(question_vector, self.vectors).flatten()
+            if not state.documents or not state.fitted:
+                return "I don't have enough information to answer your question. Please upload some content first.", False
             
-            # Get the most similar document
-            best_match_idx = np.argmax(similarities)
-            best_similarity = similarities[best_match_idx]
+            if not self.candidate_mask(user_id, content_id, state).any():
+                return "I don't have enough information to answer your question. Please upload some content first.", True
             
-            if best_similarity < 0.1:  # Threshold for relevance
-                return "I couldn't find relevant information to answer your question. Try rephrasing or ask about the uploaded content."
+            results = self._search(state, question, user_id, content_id, k=1)
+            if not results:
+                return "I couldn't find relevant information to answer your question. Try rephrasing or ask about the uploaded content.", True
             
             # Get the document
-            doc_id = list(self.documents.keys())[best_match_idx]
-            document = self.documents[doc_id]
+            document = state.documents[results[0]['content_id']]
             
             # Generate answer based on the most relevant content
             answer = self.generate_answer(question, document['summary'], document['transcript'])
             
-            return answer
+            return answer, True
             
         except Exception as e:
-            return f"Error processing your question: {str(e)}"
+            return f"Error processing your question: {str(e)}", False
     
     def generate_answer(self, question: str, summary: str, transcript: str) -> str:
         """Generate an answer based on the question and content."""
@@ -0,0 +1,171 @@
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+
+from compression import accepted_encodings, brotli, choose_encoding, compress
+from responses import etag_matches
+
+# Content-hashed build output (e.g. index-3f9a1c2b.js) never changes under the same name. A hash
+# mixes letters and digits, so dates and timestamps (notes-20240101.png) don't qualify
+HASHED_NAME = re.compile(r"[.-](?=[A-Za-z0-9_]*\d)(?=[A-Za-z0-9_]*[A-Za-z])[A-Za-z0-9_]{8,}\.\w+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# Sidecar suffix for each content coding
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+PRECOMPRESS_EXTENSIONS = (".js", ".mjs", ".css", ".html", ".json", ".svg", ".map", ".txt", ".xml", ".jsx", ".ts", ".tsx")
+
+def cache_control_for(path: str, hashed_names: bool = False) -> str:
+    """Immutable caching for content-hashed names in build output, revalidation for everything else."""
+    if hashed_names and HASHED_NAME.search(os.path.basename(path)):
+        return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``.br``/``.gz`` siblings when the client accepts them.
+
+    Precompressed files skip the compression middleware entirely, and every
+    response carries Cache-Control so browsers stop re-requesting hashed assets.
+    Only a build output directory (``hashed_names=True``) gets immutable caching;
+    elsewhere a name can be reused for new content.
+    """
+
+    def __init__(self, *args, hashed_names: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hashed_names = hashed_names
+        # (path, encoding) -> (source mtime, sidecar path, sidecar stat); avoids a stat per request
+        self._variants: Dict[Tuple[str, str], Tuple[float, Optional[str], Optional[os.stat_result]]] = {}
+
+    def _variant(self, full_path: str, stat_result: os.stat_result, encoding: str):
+        key = (full_path, encoding)
+        cached = self._variants.get(key)
+        if cached is not None and cached[0] == stat_result.st_mtime:
+            return cached[1], cached[2]
+
+        sidecar = full_path + ENCODING_SUFFIXES[encoding]
+        try:
+            sidecar_stat = os.stat(sidecar)
+            # A sidecar older than its source is stale
+            if sidecar_stat.st_mtime < stat_result.st_mtime:
+                sidecar, sidecar_stat = None, None
+        except OSError:
+            sidecar, sidecar_stat = None, None
+        self._variants[key] = (stat_result.st_mtime, sidecar, sidecar_stat)
+        return sidecar, sidecar_stat
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        headers = {"Cache-Control": cache_control_for(full_path, self.hashed_names), "Vary": "Accept-Encoding"}
+
+        response = None
+        for encoding in accepted_encodings(request_headers.get("accept-encoding", "")):
+            sidecar, sidecar_stat = self._variant(full_path, stat_result, encoding)
+            if sidecar is not None:
+                media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+                response = FileResponse(
+                    sidecar, status_code=status_code, stat_result=sidecar_stat, media_type=media_type,
+                    headers={**headers, "Content-Encoding": encoding}
+                )
+                break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+
+        if self.is_not_modified(response.headers, request_headers):
+            return Response(status_code=304, headers={
+                name: value for name, value in response.headers.items()
+                if name in ("etag", "cache-control", "vary", "last-modified")
+            })
+        return response
+
+class CachedFile:
+    """A small file (the SPA's index.html) held in memory with its ETag and encodings.
+
+    The file is re-read only when its mtime changes, checked at most once per
+    ``check_interval`` seconds.
+    """
+
+    def __init__(self, path: str, media_type: str = "text/html; charset=utf-8", check_interval: float = 1.0):
+        self.path = path
+        self.media_type = media_type
+        self.check_interval = check_interval
+        self._mtime = None
+        self._checked_at = 0.0
+        self.etag = None
+        self._bodies: Dict[Optional[str], bytes] = {}
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._bodies and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            print(f"Error loading {self.path}: {e}")
+            self._bodies = {}
+            return
+        if mtime == self._mtime and self._bodies:
+            return
+
+        with open(self.path, "rb") as f:
+            body = f.read()
+        bodies = {None: body, "gzip": compress(body, "gzip", 9)}
+        if brotli is not None:
+            bodies["br"] = compress(body, "br", 11)
+        self._bodies = bodies
+        self._mtime = mtime
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    def response(self, request: Request) -> Response:
+        self._refresh()
+        if not self._bodies:
+            raise HTTPException(status_code=404, detail="Not found")
+
+        headers = {"ETag": self.etag, "Cache-Control": REVALIDATE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is not None and encoding in self._bodies:
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = f"W/{self.etag}"
+        else:
+            encoding = None
+        return Response(self._bodies[encoding], media_type=self.media_type, headers=headers)
+
+def precompress_directory(directory: str, min_size: int = 1024) -> int:
+    """Write .gz (and .br) siblings for text assets under a directory; returns files written."""
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            if os.path.getsize(path) < min_size:
+                continue
+            with open(path, "rb") as f:
+                body = f.read()
+            for encoding, suffix in ENCODING_SUFFIXES.items():
+                if encoding == "br" and brotli is None:
+                    continue
+                level = 11 if encoding == "br" else 9
+                with open(path + suffix, "wb") as f:
+                    f.write(compress(body, encoding, level))
+                written += 1
+    return written
+
+if __name__ == "__main__":
+    # Usage: python static_files.py src attached_assets
+    for directory in sys.argv[1:] or ["src", "attached_assets"]:
+        print(f"{directory}: {precompress_directory(directory)} precompressed files written")
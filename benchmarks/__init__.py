@@ -0,0 +1 @@
+# SmartScribe benchmark suite
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict
+
+from benchmarks.bench_api import auth_headers, load_app
+from benchmarks.bench_vector import _populate
+from benchmarks.common import scratch_dir, summarize
+from benchmarks.generators import make_corpus
+
+# Cheap endpoints while the heavy slots are saturated: p95 may grow to this multiple of the idle
+# p95 (never below idle + CHEAP_BUDGET_FLOOR_MS, which absorbs timer noise on sub-ms endpoints)
+CHEAP_SLOWDOWN_BUDGET = float(os.getenv("ADMISSION_CHEAP_SLOWDOWN_BUDGET", "3"))
+CHEAP_BUDGET_FLOOR_MS = 5.0
+
+async def _sample(client, method: str, url: str, samples: list, statuses: dict, **kwargs):
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    samples.append(time.perf_counter() - start)
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return response
+
+async def _cheap_traffic(client, quiz_id: str, requests: int, interval: float) -> Dict[str, Any]:
+    """Steady trickle of cheap requests; returns latency per endpoint."""
+    endpoints = {
+        "content_list": ("GET", "/api/content", {}),
+        "quiz_submit": ("POST", f"/api/quiz/{quiz_id}/submit", {"json": {"answers": ["A", "B", "C", "D", "A"]}}),
+        "health": ("GET", "/api/health/live", {}),
+    }
+    results = {}
+    for name, (method, url, kwargs) in endpoints.items():
+        samples, statuses = [], {}
+        for _ in range(requests):
+            await _sample(client, method, url, samples, statuses, **kwargs)
+            await asyncio.sleep(interval)
+        results[name] = (samples, statuses)
+    return results
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from admission import AdmissionController, EndpointLimit
+
+    num_docs = 500 if quick else 3000
+    cheap_requests = 20 if quick else 100
+    heavy_requests = 40 if quick else 200
+
+    with scratch_dir():
+        main, db = load_app()
+        # The production policy, with small buckets so the burst also exercises 429s
+        main.admission = AdmissionController(
+            {
+                "qa_ask": EndpointLimit(60, 20, priority=0),
+                "quiz_generate": EndpointLimit(20, 5, priority=1),
+                "upload": EndpointLimit(600, heavy_requests, priority=2),
+            },
+            max_concurrency=2, max_queue=16, queue_timeout=30
+        )
+        _populate(main.vector_service, make_corpus(num_docs, seed=35))
+        main.vector_service.rebuild_vectors()
+
+        async def scenario():
+            headers = await auth_headers(db)
+            user = await db.users.find_one({"email": "bench@example.com"})
+            content = {"user_id": str(user["_id"]), "title": "Lecture", "content_type": "upload",
+                       "transcript": "A lecture. " * 50, "summary": "A lecture.", "language": "en",
+                       "created_at": main.datetime.utcnow()}
+            content_id = (await db.content.insert_one(content)).inserted_id
+            quiz = {"content_id": content_id, "user_id": str(user["_id"]), "created_at": main.datetime.utcnow(),
+                    "questions": [{"question": f"Q{i}", "correct_answer": "A",
+                                   "options": [{"option": o, "text": o} for o in "ABCD"]} for i in range(5)]}
+            quiz_id = (await db.quizzes.insert_one(quiz)).inserted_id
+
+            results = {}
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=120) as client:
+                idle = await _cheap_traffic(client, quiz_id, cheap_requests, 0.002)
+                for name, (samples, statuses) in idle.items():
+                    results[f"admission.idle.{name}"] = summarize(samples, statuses=statuses)
+
+                # Saturate the heavy paths: a burst of uploads (each a full index refit)
+                heavy_samples, heavy_statuses, retry_after = [], {}, set()
+
+                async def heavy(i):
+                    response = await _sample(
+                        client, "POST", "/api/content/upload", heavy_samples, heavy_statuses,
+                        data={"title": f"Burst {i}", "youtube_url": f"https://youtu.be/{i}", "link_duplicates": "false"},
+                    )
+                    if response.status_code == 429:
+                        retry_after.add(response.headers.get("retry-after"))
+
+                start = time.perf_counter()
+                heavy_task = asyncio.gather(*(heavy(i) for i in range(heavy_requests)))
+                await asyncio.sleep(0.05)
+                saturated = await _cheap_traffic(client, quiz_id, cheap_requests, 0.002)
+                await heavy_task
+                elapsed = time.perf_counter() - start
+
+                for name, (samples, statuses) in saturated.items():
+                    idle = results[f"admission.idle.{name}"]
+                    if set(statuses) != {200}:
+                        raise AssertionError(f"{name} under a saturated heavy pool returned {statuses}, expected only 200")
+                    summary = summarize(
+                        samples, statuses=statuses, budget_stat="p95_ms",
+                        budget_ms=round(max(idle["p95_ms"] * CHEAP_SLOWDOWN_BUDGET,
+                                            idle["p95_ms"] + CHEAP_BUDGET_FLOOR_MS), 3)
+                    )
+                    summary["slowdown_vs_idle"] = round(summary["median_ms"] / idle["median_ms"], 2) if idle["median_ms"] else None
+                    results[f"admission.saturated.{name}"] = summary
+                results["admission.saturated.upload"] = summarize(
+                    heavy_samples, statuses=heavy_statuses, seconds=round(elapsed, 2),
+                    retry_after=sorted(value for value in retry_after if value), docs=num_docs,
+                    shed=main.admission.counters["upload"]["shed"]
+                )
+
+                # One user over their quiz-generation budget (burst of 5) gets 429 + Retry-After
+                samples, statuses = [], {}
+                for _ in range(8):
+                    response = await _sample(client, "POST", f"/api/quiz/generate/{content_id}", samples, statuses,
+                                             json={"num_questions": 3})
+                results["admission.rate_limited.quiz_generate"] = summarize(
+                    samples, statuses=statuses, retry_after=response.headers.get("retry-after")
+                )
+            return results
+
+        return asyncio.run(scenario())
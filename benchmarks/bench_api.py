@@ -0,0 +1,177 @@
+import asyncio
+import importlib
+import os
+import random
+import time
+from typing import Any, Dict
+
+from benchmarks.common import scratch_dir, summarize
+from benchmarks.fake_mongo import FakeDatabase
+from benchmarks.generators import make_questions, make_transcript
+
+# A content-hashed bundle, as a production build would emit it
+STATIC_ASSET = "index-3f9a1c2b.js"
+# A pasted attachment: its timestamp is not a content hash
+ATTACHED_ASSET = "Pasted-lecture-notes-1725612345678.txt"
+
+def _prepare_static_dirs():
+    # main.py mounts these relative to the working directory
+    os.makedirs("src", exist_ok=True)
+    os.makedirs("attached_assets", exist_ok=True)
+    with open("index.html", "w", encoding="utf-8") as f:
+        f.write("<!doctype html><html><body><div id=\"root\"></div></body></html>")
+    with open(os.path.join("src", STATIC_ASSET), "w", encoding="utf-8") as f:
+        f.write("export const lecture = () => null;\n" * 2000)
+    with open(os.path.join("src", "notes-20240101.png"), "wb") as f:
+        f.write(b"\x89PNG\r\n")
+    with open(os.path.join("attached_assets", ATTACHED_ASSET), "w", encoding="utf-8") as f:
+        f.write("Lecture notes\n")
+
+def load_app(object_ids: bool = False):
+    """Import the app against an in-memory database; call inside scratch_dir().
+
+    With ``object_ids`` the database assigns ObjectId keys, as Mongo does.
+    """
+    _prepare_static_dirs()
+    import auth
+    import main
+
+    if not os.path.isdir("vector_storage"):
+        # Imported by an earlier suite in another scratch dir: rebuild against this one
+        main = importlib.reload(main)
+
+    db = FakeDatabase(object_ids=object_ids)
+    main.get_database = lambda: db
+    auth.get_database = lambda: db
+    # Load tests measure the endpoints, not the per-user rate limits
+    for limit in main.admission.limits.values():
+        limit.rate_per_minute = limit.burst = 1e9
+    main.admission.max_queue = 100_000
+    return main, db
+
+async def auth_headers(db) -> Dict[str, str]:
+    import auth
+    from datetime import datetime
+
+    user = {"email": "bench@example.com", "full_name": "Bench", "password": "x",
+            "is_active": True, "created_at": datetime.utcnow()}
+    await db.users.insert_one(user)
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': user['email']})}"}
+
+async def _load(client, method: str, url: str, concurrency: int, total: int, **kwargs):
+    """Issue ``total`` requests with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    statuses = {}
+
+    async def one(i):
+        async with semaphore:
+            request_kwargs = {key: value(i) if callable(value) else value for key, value in kwargs.items()}
+            start = time.perf_counter()
+            response = await client.request(method, url, **request_kwargs)
+            samples.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return summarize(samples, concurrency=concurrency, requests=total,
+                     throughput_rps=round(total / elapsed, 2), statuses=statuses)
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from config import QUIZ_BULK_MAX_SUBMISSIONS
+    from static_files import precompress_directory
+
+    total = 50 if quick else 400
+    concurrency = 10 if quick else 50
+
+    with scratch_dir():
+        main, db = load_app(object_ids=True)
+
+        async def scenario():
+            headers = await auth_headers(db)
+
+            results = {}
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60) as client:
+                upload_total = max(5, total // 10)
+                # The mocked transcripts are identical, so opt out of duplicate linking to measure full ingest
+                results["api.upload"] = await _load(
+                    client, "POST", "/api/content/upload", min(concurrency, upload_total), upload_total,
+                    data=lambda i: {"title": f"Lecture {i}", "youtube_url": f"https://youtu.be/{i}",
+                                    "link_duplicates": "false"},
+                )
+                results["api.upload_duplicate"] = await _load(
+                    client, "POST", "/api/content/upload", min(concurrency, upload_total), upload_total,
+                    data=lambda i: {"title": f"Copy {i}", "youtube_url": f"https://youtu.be/copy-{i}"},
+                )
+                content_id = db.content.documents[0]["_id"]
+                # Give the quiz path a realistic transcript to work on
+                db.content.documents[0]["transcript"] = make_transcript(3000, seed=5)
+
+                results["api.content_list"] = await _load(client, "GET", "/api/content", concurrency, total)
+                results["api.content_detail"] = await _load(
+                    client, "GET", f"/api/content/{content_id}", concurrency, total
+                )
+
+                questions = make_questions(20, seed=4)
+                results["api.qa_ask"] = await _load(
+                    client, "POST", "/api/qa/ask", concurrency, total,
+                    json=lambda i: {"question": questions[i % len(questions)]},
+                )
+
+                quiz_total = max(5, total // 10)
+                results["api.quiz_generate"] = await _load(
+                    client, "POST", f"/api/quiz/generate/{content_id}", min(concurrency, quiz_total), quiz_total,
+                    json={"num_questions": 5},
+                )
+                quiz_id = db.quizzes.documents[0]["_id"]
+                results["api.quiz_submit"] = await _load(
+                    client, "POST", f"/api/quiz/{quiz_id}/submit", concurrency, total,
+                    json={"answers": ["A", "B", "C", "D", "A"]},
+                )
+
+                # A class of students submitting at the end of a lecture, one request per sheet...
+                class_size = 300
+                results["api.quiz_submit_class"] = await _load(
+                    client, "POST", f"/api/quiz/{quiz_id}/submit", class_size, class_size,
+                    json=lambda i: {"answers": [random.choice("ABCD") for _ in range(5)]},
+                )
+                # ...and the same class graded through the bulk endpoint
+                sheets = [{"student_id": f"s{i}", "answers": [random.choice("ABCD") for _ in range(5)]}
+                          for i in range(class_size)]
+                results["api.quiz_submit_bulk"] = await _load(
+                    client, "POST", f"/api/quiz/{quiz_id}/submit/bulk", 5, 10,
+                    json={"submissions": sheets},
+                )
+                results["api.quiz_submit_bulk"]["submissions_per_request"] = class_size
+                for name in ("api.content_detail", "api.quiz_submit", "api.quiz_submit_class", "api.quiz_submit_bulk"):
+                    if set(results[name]["statuses"]) != {200}:
+                        raise AssertionError(f"{name} against ObjectId keys: statuses {results[name]['statuses']}")
+                # One bulk request may not carry an unbounded class past admission control
+                sheets = sheets * (QUIZ_BULK_MAX_SUBMISSIONS // class_size + 1)
+                response = await client.post(f"/api/quiz/{quiz_id}/submit/bulk", json={"submissions": sheets})
+                if response.status_code != 422:
+                    raise AssertionError(f"bulk submit of {len(sheets)} sheets returned {response.status_code}")
+
+                # Static traffic: the in-memory SPA shell and a precompressed hashed asset
+                results["api.spa_index"] = await _load(client, "GET", "/dashboard", concurrency, total)
+                etag = (await client.get("/")).headers["etag"]
+                results["api.spa_index_revalidate"] = await _load(
+                    client, "GET", "/dashboard", concurrency, total, headers={"If-None-Match": etag}
+                )
+                precompress_directory("src")
+                results["api.static_asset"] = await _load(
+                    client, "GET", f"/src/{STATIC_ASSET}", concurrency, total, headers={"Accept-Encoding": "br, gzip"}
+                )
+
+                # Only hashed build output is immutable; a timestamped attachment can change under its name
+                for url, immutable in ((f"/src/{STATIC_ASSET}", True), ("/src/notes-20240101.png", False),
+                                       (f"/attached_assets/{ATTACHED_ASSET}", False)):
+                    cache_control = (await client.get(url)).headers.get("cache-control", "")
+                    if ("immutable" in cache_control) != immutable:
+                        raise AssertionError(f"{url}: Cache-Control {cache_control!r}")
+            return results
+
+        return asyncio.run(scenario())
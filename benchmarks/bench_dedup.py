@@ -0,0 +1,95 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict
+
+from benchmarks.common import measure, scratch_dir, summarize
+from benchmarks.generators import SIZES, make_corpus, make_transcript
+
+# Stored documents per user for the lookup benchmarks
+LIBRARY_SIZES = (1_000, 10_000)
+QUICK_LIBRARY_SIZES = (1_000,)
+
+def _edit(text: str, rate: float, seed: int) -> str:
+    """Re-recording stand-in: replace a fraction of the words."""
+    rng = random.Random(seed)
+    return " ".join(word if rng.random() >= rate else "uh" for word in text.split())
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    from services.dedup_service import DedupService, similarity
+
+    service = DedupService()
+    results = {}
+    for size, num_words in SIZES.items():
+        text = make_transcript(num_words, seed=7)
+        results[f"dedup.signature.{size}"] = measure(
+            lambda: service.signature(text), repeat=3 if size == "large" else 5, words=num_words
+        )
+
+    for num_docs in (QUICK_LIBRARY_SIZES if quick else LIBRARY_SIZES):
+        corpus = make_corpus(num_docs, words_per_doc=300, seed=num_docs)
+        signatures = {content_id: service.signature(transcript) for content_id, transcript, _ in corpus}
+        service.load_user("bench", ((content_id, service.encode(sig)) for content_id, sig in signatures.items()))
+
+        # Probes: lightly edited copies (should match) and fresh transcripts (should not)
+        rng = random.Random(num_docs)
+        probes = [(content_id, _edit(transcript, 0.02, i)) for i, (content_id, transcript, _) in
+                  enumerate(rng.sample(corpus, 50))]
+        fresh = [make_transcript(300, seed=10_000 + i) for i in range(50)]
+        probe_signatures = [(content_id, service.signature(text)) for content_id, text in probes]
+        fresh_signatures = [service.signature(text) for text in fresh]
+
+        samples, found = [], 0
+        for content_id, signature in probe_signatures:
+            start = time.perf_counter()
+            match = service.find_duplicate("bench", signature)
+            samples.append(time.perf_counter() - start)
+            found += bool(match and match[0] == content_id)
+        false_matches = sum(service.find_duplicate("bench", signature) is not None for signature in fresh_signatures)
+        results[f"dedup.lsh_lookup.{num_docs}"] = summarize(
+            samples, docs=num_docs, recall=round(found / len(probes), 3),
+            false_match_rate=round(false_matches / len(fresh), 3)
+        )
+
+        # The linear scan the LSH index avoids
+        stored = list(signatures.values())
+        results[f"dedup.linear_scan.{num_docs}"] = measure(
+            lambda: max(similarity(probe_signatures[0][1], sig) for sig in stored), repeat=3, docs=num_docs
+        )
+
+    results.update(_linking_through_api(5 if quick else 20))
+    return results
+
+def _linking_through_api(uploads: int) -> Dict[str, Dict[str, Any]]:
+    """Duplicate uploads through the app, with ObjectId keys as Mongo assigns them; every one must be linked."""
+    import httpx
+    from benchmarks.bench_api import auth_headers, load_app
+
+    with scratch_dir():
+        main, db = load_app(object_ids=True)
+
+        async def scenario():
+            headers = await auth_headers(db)
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60) as client:
+                original = (await client.post("/api/content/upload", data={
+                    "title": "Lecture", "youtube_url": "https://youtu.be/original"
+                })).json()
+                samples = []
+                for i in range(uploads):
+                    start = time.perf_counter()
+                    copy = (await client.post("/api/content/upload", data={
+                        "title": f"Copy {i}", "youtube_url": f"https://youtu.be/copy-{i}"
+                    })).json()
+                    samples.append(time.perf_counter() - start)
+                    if copy.get("duplicate_of") != original["id"]:
+                        raise AssertionError(f"upload {copy.get('id')} linked to {copy.get('duplicate_of')}, "
+                                             f"expected {original['id']}")
+                # Q&A on a duplicate is answered from the original
+                response = await client.post("/api/qa/ask", json={"question": "What is the lecture about?",
+                                                                  "content_id": copy["id"]})
+                if response.status_code != 200:
+                    raise AssertionError(f"Q&A on a duplicate returned {response.status_code}")
+            return {"dedup.api.upload_linked": summarize(samples, uploads=uploads, object_ids=True)}
+
+        return asyncio.run(scenario())
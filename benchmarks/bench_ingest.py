@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict
+
+from benchmarks.common import scratch_dir, summarize
+from benchmarks.fake_mongo import FakeDatabase
+from benchmarks.generators import make_corpus
+
+# Archive sizes (transcripts) for the bulk import
+DOC_COUNTS = (1_000, 10_000)
+QUICK_DOC_COUNTS = (200,)
+# Per-document ingest refits the whole index each time, so it is only timed on a small archive
+PER_DOCUMENT_COUNT = 200
+
+def _write_archive(path: str, corpus):
+    with open(path, "w", encoding="utf-8") as f:
+        for content_id, transcript, _ in corpus:
+            f.write(json.dumps({"id": content_id, "title": content_id, "transcript": transcript}) + "\n")
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    from bulk_ingest import run_import
+    from services.nlp_service import NLPService
+    from services.term_stats import TermStatistics
+    from services.vector_service import VectorService
+
+    results = {}
+    for num_docs in (QUICK_DOC_COUNTS if quick else DOC_COUNTS):
+        corpus = make_corpus(num_docs, words_per_doc=300, seed=num_docs)
+        with scratch_dir():
+            _write_archive("archive.jsonl", corpus)
+            # ObjectId keys, as a real import gets them from insert_many
+            db = FakeDatabase(object_ids=True)
+            vector_service = VectorService()
+            report = asyncio.run(run_import(
+                "archive.jsonl", "bench", db, vector_service, TermStatistics(), batch_size=500
+            ))
+            if len(vector_service.documents) != num_docs:
+                raise AssertionError(f"bulk import indexed {len(vector_service.documents)} of {num_docs} documents")
+            results[f"ingest.bulk.{num_docs}"] = summarize(
+                [report["total_seconds"]], docs=num_docs, workers=os.cpu_count(),
+                docs_per_sec=report["docs_per_sec"],
+                summarize_docs_per_sec=report["summarize_docs_per_sec"],
+                index_docs_per_sec=report["index_docs_per_sec"],
+                indexed=len(vector_service.documents)
+            )
+
+            # Re-running a finished import only reads the checkpoint
+            start = time.perf_counter()
+            rerun = asyncio.run(run_import("archive.jsonl", "bench", db, vector_service, TermStatistics()))
+            results[f"ingest.resume_finished.{num_docs}"] = summarize(
+                [time.perf_counter() - start], docs=num_docs, inserted=rerun["inserted"]
+            )
+
+    # The upload path: summarize, then refit and snapshot the index for every document
+    corpus = make_corpus(PER_DOCUMENT_COUNT, words_per_doc=300, seed=PER_DOCUMENT_COUNT)
+    with scratch_dir():
+        nlp_service = NLPService()
+        vector_service = VectorService()
+
+        async def ingest_one_by_one():
+            for content_id, transcript, _ in corpus:
+                summary = await nlp_service.generate_summary(transcript)
+                await vector_service.store_content(content_id, transcript, summary, user_id="bench")
+
+        start = time.perf_counter()
+        asyncio.run(ingest_one_by_one())
+        elapsed = time.perf_counter() - start
+        results[f"ingest.per_document.{PER_DOCUMENT_COUNT}"] = summarize(
+            [elapsed], docs=PER_DOCUMENT_COUNT, docs_per_sec=round(PER_DOCUMENT_COUNT / elapsed, 2)
+        )
+    return results
@@ -0,0 +1,41 @@
+import os
+from typing import Any, Dict
+
+from benchmarks.common import measure, scratch_dir
+from benchmarks.generators import SIZES, make_corpus, make_transcript
+
+# Library size behind the keyword IDF
+LIBRARY_DOCS = 1_000
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    from services.nlp_service import NLPService
+    from services.term_stats import TermStatistics
+
+    results = {}
+    with scratch_dir():
+        term_stats = TermStatistics()
+        library = make_corpus(200 if quick else LIBRARY_DOCS, seed=36)
+        term_stats.add_documents("bench", ((content_id, transcript) for content_id, transcript, _ in library))
+        nlp = NLPService(term_stats=term_stats)
+
+        for size, num_words in SIZES.items():
+            if quick and size == "large":
+                continue
+            text = make_transcript(num_words, seed=1)
+            repeat = 3 if size == "large" else 5
+            results[f"nlp.generate_summary.{size}"] = measure(
+                lambda: nlp.generate_summary(text), repeat=repeat, words=num_words
+            )
+            results[f"nlp.extract_keywords.{size}"] = measure(
+                lambda: nlp.extract_keywords(text, user_id="bench"), repeat=repeat, words=num_words
+            )
+
+        # Incremental update at ingest: one document against the existing table, persisted
+        extra = iter([(f"new-{content_id}", transcript) for content_id, transcript, _ in make_corpus(20, seed=37)])
+        stats = term_stats.stats("bench")
+        table_bytes = os.path.getsize(term_stats._path("bench"))
+        results["nlp.term_stats.add_document"] = measure(
+            lambda: term_stats.add_document("bench", *next(extra)), repeat=10, warmup=0,
+            library_docs=stats["documents"], terms=stats["terms"], table_bytes=table_bytes
+        )
+    return results
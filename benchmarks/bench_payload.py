@@ -0,0 +1,87 @@
+import asyncio
+import gzip
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from benchmarks.bench_api import auth_headers, load_app
+from benchmarks.common import measure, scratch_dir, summarize
+from benchmarks.generators import make_transcript
+
+TRANSCRIPT_BYTES = 1_000_000
+
+def _one_megabyte_transcript() -> str:
+    text = make_transcript(TRANSCRIPT_BYTES // 5, seed=21)
+    return text[:TRANSCRIPT_BYTES]
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from compression import brotli
+    from models import ContentDetailResponse
+    from responses import FastJSONResponse
+
+    transcript = _one_megabyte_transcript()
+    model = ContentDetailResponse(
+        id="content", title="Lecture", content_type="upload", summary=transcript[:600],
+        transcript=transcript, language="en", created_at=datetime.utcnow()
+    )
+    data = model.model_dump(mode="json")
+    body = json.dumps(data).encode()
+    repeat = 5 if quick else 20
+    results = {
+        "payload.serialize.stdlib_json": measure(lambda: json.dumps(data).encode(), repeat=repeat, bytes=len(body)),
+        "payload.serialize.fast_json": measure(
+            lambda: FastJSONResponse(data).body, repeat=repeat, bytes=len(FastJSONResponse(data).body)
+        ),
+        "payload.serialize.pydantic_json": measure(model.model_dump_json, repeat=repeat, bytes=len(body)),
+        "payload.compress.gzip": measure(lambda: gzip.compress(body, 6), repeat=repeat,
+                                         bytes=len(gzip.compress(body, 6))),
+    }
+    if brotli is not None:
+        results["payload.compress.br"] = measure(lambda: brotli.compress(body, quality=4), repeat=repeat,
+                                                 bytes=len(brotli.compress(body, quality=4)))
+
+    # Through the app: response bytes per encoding and the 304 revalidation path
+    with scratch_dir():
+        main, db = load_app()
+
+        async def scenario():
+            headers = await auth_headers(db)
+            user = await db.users.find_one({"email": "bench@example.com"})
+            doc = {"user_id": str(user["_id"]), "title": "Lecture", "content_type": "upload",
+                   "transcript": transcript, "summary": transcript[:600], "language": "en",
+                   "created_at": datetime.utcnow()}
+            doc["content_hash"] = main.content_fingerprint(doc)
+            content_id = (await db.content.insert_one(doc)).inserted_id
+
+            api_results = {}
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+                url = f"/api/content/{content_id}"
+                etag = None
+                for encoding in ("identity", "gzip", "br"):
+                    samples, size = [], 0
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        # Read the raw stream so the size is what went over the wire
+                        async with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+                            size = sum([len(chunk) async for chunk in response.aiter_raw()])
+                        samples.append(time.perf_counter() - start)
+                        etag = etag or response.headers.get("etag")
+                    api_results[f"payload.api.content_detail.{encoding}"] = summarize(
+                        samples, bytes=size, content_encoding=response.headers.get("content-encoding", "identity")
+                    )
+
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    response = await client.get(url, headers={"If-None-Match": etag})
+                    samples.append(time.perf_counter() - start)
+                api_results["payload.api.content_detail.not_modified"] = summarize(
+                    samples, status=response.status_code, bytes=len(response.content)
+                )
+            return api_results
+
+        results.update(asyncio.run(scenario()))
+    return results
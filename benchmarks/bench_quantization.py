@@ -0,0 +1,146 @@
+import random
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.bench_vector import _populate
+from benchmarks.common import scratch_dir, summarize
+from benchmarks.generators import make_corpus, make_questions
+
+RECALL_K = 10
+RESCORE_CANDIDATES = 100
+# Sentence-transformers sized embeddings (all-MiniLM-L6-v2)
+EMBEDDING_DIM = 384
+LATENT_DIM = 32
+
+def _overlap(found: List[int], expected: List[int]) -> float:
+    return len(set(found) & set(expected)) / max(1, len(expected))
+
+def _exact_top(vectors: np.ndarray, query: np.ndarray, k: int) -> List[int]:
+    scores = vectors @ query
+    return list(np.argsort(-scores, kind="stable")[:k])
+
+def _dense_cases(label: str, vectors: np.ndarray, queries: np.ndarray, pq_subspaces: int) -> Dict[str, Dict[str, Any]]:
+    """Memory per million vectors and recall@10 (vs. exact float32) for each dense representation."""
+    from services.quantization import Int8Quantizer, ProductQuantizer
+
+    expected = [_exact_top(vectors, query, RECALL_K) for query in queries]
+    results = {}
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        _exact_top(vectors, query, RECALL_K)
+        samples.append(time.perf_counter() - start)
+    results[f"quant.dense.{label}.float32"] = summarize(
+        samples, vectors=len(vectors), mb_per_million=round(vectors[0].nbytes * 1e6 / 2**20, 1), recall_at_10=1.0
+    )
+
+    for quantizer in (Int8Quantizer(), ProductQuantizer(num_subspaces=pq_subspaces)):
+        quantizer.fit(vectors)
+        first_pass, rescored, samples = [], [], []
+        for query, exact in zip(queries, expected):
+            start = time.perf_counter()
+            approximate = quantizer.scores(query)
+            rows = np.sort(np.argpartition(-approximate, RESCORE_CANDIDATES)[:RESCORE_CANDIDATES])
+            top = rows[np.argsort(-(vectors[rows] @ query), kind="stable")[:RECALL_K]]
+            samples.append(time.perf_counter() - start)
+            first_pass.append(_overlap(list(np.argsort(-approximate, kind="stable")[:RECALL_K]), exact))
+            rescored.append(_overlap(list(top), exact))
+        results[f"quant.dense.{label}.{quantizer.name}"] = summarize(
+            samples, vectors=len(vectors),
+            mb_per_million=round(quantizer.codes[0].nbytes * 1e6 / 2**20, 1),
+            first_pass_recall_at_10=round(float(np.mean(first_pass)), 4),
+            recall_at_10=round(float(np.mean(rescored)), 4),
+            rescore_candidates=RESCORE_CANDIDATES
+        )
+    return results
+
+def _embeddings(num_vectors: int, num_queries: int, seed: int):
+    """Unit vectors with a low-dimensional latent structure, a stand-in for sentence embeddings."""
+    rng = np.random.RandomState(seed)
+    basis = rng.normal(size=(LATENT_DIM, EMBEDDING_DIM)).astype(np.float32)
+
+    def embed(latent):
+        vectors = latent @ basis + 0.5 * rng.normal(size=(len(latent), EMBEDDING_DIM)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    latent = rng.normal(size=(num_vectors, LATENT_DIM)).astype(np.float32)
+    probes = latent[rng.choice(num_vectors, num_queries, replace=False)]
+    return embed(latent), embed(probes + 0.3 * rng.normal(size=probes.shape).astype(np.float32))
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    from services.hybrid_retrieval import BM25Index, tokenize
+    from services.vector_service import VectorService
+
+    num_docs = 2_000 if quick else 10_000
+    corpus = make_corpus(num_docs, words_per_doc=300, seed=num_docs)
+    questions = make_questions(50, seed=5)
+    rng = random.Random(3)
+    # Questions built from document text, so lexical matches exist
+    questions += [" ".join(rng.sample(transcript.split(), 8)) for _, transcript, _ in rng.sample(corpus, 50)]
+    results = {}
+
+    # LSA vectors as VectorService fits them
+    with scratch_dir():
+        service = VectorService()
+        service.loaded = True
+        _populate(service, corpus)
+        service.rebuild_vectors()
+        lsa = np.asarray(service.dense_vectors, dtype=np.float32)
+        queries = np.stack([service.encoder.encode_query(question) for question in questions])
+    results.update(_dense_cases(f"lsa{lsa.shape[1]}.{num_docs}", lsa, queries, pq_subspaces=16))
+
+    num_vectors = 20_000 if quick else 200_000
+    vectors, queries = _embeddings(num_vectors, 50, seed=num_vectors)
+    results.update(_dense_cases(f"embedding{EMBEDDING_DIM}.{num_vectors}", vectors, queries, pq_subspaces=48))
+
+    # Sparse: BM25 postings at full precision, float16, and pruned to the top terms per document
+    texts = [f"{summary}\n\n{transcript}" for _, transcript, summary in corpus]
+    exact_index = BM25Index().build(texts)
+    token_lists = [tokenize(question) for question in questions]
+    expected = [[row for row, _ in exact_index.search(tokens, RECALL_K)] for tokens in token_lists]
+    full_bytes = exact_index.nbytes
+    for label, max_terms in (("float32", None), ("float16", 0), ("pruned24", 24), ("pruned16", 16)):
+        index = exact_index if max_terms is None else BM25Index(compress=True, max_terms=max_terms).build(texts)
+        recalls, samples = [], []
+        for tokens, exact in zip(token_lists, expected):
+            start = time.perf_counter()
+            if max_terms:
+                rows = [row for row, _ in index.search(tokens, RESCORE_CANDIDATES)]
+                scores = index.exact_scores(tokens, rows, [texts[row] for row in rows])
+                found = [rows[i] for i in np.argsort(-scores, kind="stable")[:RECALL_K]]
+            else:
+                found = [row for row, _ in index.search(tokens, RECALL_K)]
+            samples.append(time.perf_counter() - start)
+            recalls.append(_overlap(found, exact))
+        results[f"quant.bm25.{label}.{num_docs}"] = summarize(
+            samples, docs=num_docs,
+            mb_per_million=round(index.nbytes / num_docs * 1e6 / 2**20, 1),
+            size_ratio=round(index.nbytes / full_bytes, 3),
+            recall_at_10=round(float(np.mean(recalls)), 4)
+        )
+
+    # End to end: hybrid search with the compressed index vs. the full-precision one
+    hits = {}
+    for compression in ("none", "int8", "pq"):
+        with scratch_dir():
+            service = VectorService(compression=compression, sparse_max_terms=24 if compression == "pq" else 0)
+            service.loaded = True
+            _populate(service, corpus)
+            service.rebuild_vectors()
+            service.save_data()
+            samples, rankings = [], []
+            for question in questions:
+                start = time.perf_counter()
+                rankings.append([hit["content_id"] for hit in service.search(question, k=RECALL_K)])
+                samples.append(time.perf_counter() - start)
+            hits[compression] = rankings
+            memory = service.memory_usage()
+            results[f"quant.search.{compression}.{num_docs}"] = summarize(
+                samples, docs=num_docs, resident_bytes=sum(memory.values()), **memory,
+                recall_at_10=round(float(np.mean([
+                    _overlap(found, expected) for found, expected in zip(rankings, hits["none"])
+                ])), 4)
+            )
+    return results
@@ -0,0 +1,69 @@
+import random
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.common import measure
+from benchmarks.generators import SIZES, make_transcript
+
+CLASS_SIZE = 300
+
+def _grade_reference(quiz: Dict[str, Any], answers: List[str]) -> Tuple[int, float]:
+    """Per-question grading loop, as the submit endpoint scored sheets before answer keys."""
+    correct = 0
+    total = len(quiz["questions"])
+    for i, answer in enumerate(answers):
+        if i < total and answer == quiz["questions"][i]["correct_answer"]:
+            correct += 1
+    return correct, (correct / total) * 100 if total > 0 else 0
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    from services.quiz_service import QuizService
+
+    quiz = QuizService()
+    random.seed(0)
+    results = {}
+    for size, num_words in SIZES.items():
+        if quick and size == "large":
+            continue
+        text = make_transcript(num_words, seed=2)
+        results[f"quiz.generate_quiz.{size}"] = measure(
+            lambda: quiz.generate_quiz(text, num_questions=5), repeat=3 if size == "large" else 5, words=num_words
+        )
+
+    # Grading a class of answer sheets: per-submission Python loop vs. one vectorized pass
+    from services.grading_service import GradingService
+
+    grading = GradingService()
+    quiz_doc = {
+        "_id": "quiz",
+        "user_id": "owner",
+        "questions": [{"correct_answer": random.choice("ABCD")} for _ in range(20)],
+    }
+    key = grading.build_key(quiz_doc)
+    sheets = [[random.choice("ABCD") for _ in range(20)] for _ in range(CLASS_SIZE)]
+
+    def grade_loop():
+        for answers in sheets:
+            _grade_reference(quiz_doc, answers)
+
+    # The vectorized grader must score every sheet exactly like the per-question loop,
+    # including blank, multi-character, short and over-long sheets
+    checks = [
+        (["A", "B"], [["AB", ""], ["", "AB"], ["A"], ["A", "B", "C"], ["a", "B"], ["A", "B"]]),
+        (["A", "B", "C"], [["A", "", ""], ["AB", "", "C"], ["A", "X", "Y"]]),
+        (["A", "True", "B"], [["A", "True", "B"], ["A", "", "TrueB"], ["AT", "rue", "B"]]),
+    ]
+    for i, (correct_answers, check_sheets) in enumerate(checks):
+        check_quiz = {"_id": f"check-{i}", "user_id": "owner",
+                      "questions": [{"correct_answer": answer} for answer in correct_answers]}
+        check_key = grading.build_key(check_quiz)
+        correct, scores = grading.grade_batch(check_key, check_sheets)
+        for answers, got in zip(check_sheets, zip(correct.tolist(), scores.tolist())):
+            expected = _grade_reference(check_quiz, answers)
+            if got != expected:
+                raise AssertionError(f"grade_batch({correct_answers}, {answers}) = {got}, expected {expected}")
+
+    results[f"quiz.grade_loop.{CLASS_SIZE}"] = measure(grade_loop, repeat=20, submissions=CLASS_SIZE)
+    results[f"quiz.grade_batch.{CLASS_SIZE}"] = measure(
+        lambda: grading.grade_batch(key, sheets), repeat=20, submissions=CLASS_SIZE
+    )
+    return results
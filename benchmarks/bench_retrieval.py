@@ -0,0 +1,66 @@
+import random
+import time
+from typing import Any, Dict, List
+
+from benchmarks.bench_vector import _populate
+from benchmarks.common import scratch_dir, summarize
+from benchmarks.generators import make_corpus, make_labeled_qa
+
+RECALL_KS = (1, 5, 10)
+
+def _paraphrase(question: str, rng: random.Random) -> str:
+    # Keep about half of the words, reordered: little exact phrase overlap remains
+    words = question.rstrip("?").split()
+    kept = rng.sample(words, max(2, len(words) // 2))
+    return " ".join(kept) + "?"
+
+def _recall(rankings: List[List[str]], labeled: List[Dict[str, str]]) -> Dict[str, float]:
+    return {
+        f"recall@{k}": round(sum(item["content_id"] in ranking[:k] for ranking, item in zip(rankings, labeled)) / len(labeled), 4)
+        for k in RECALL_KS
+    }
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    from sklearn.metrics.pairwise import cosine_similarity
+    from services.vector_service import VectorService
+
+    num_docs = 1_000 if quick else 10_000
+    corpus = make_corpus(num_docs, seed=7)
+    rng = random.Random(11)
+    labeled = make_labeled_qa(rng.sample(corpus, min(200, num_docs)), seed=13)
+    paraphrased = [{**item, "question": _paraphrase(item["question"], rng)} for item in labeled]
+    results = {}
+
+    with scratch_dir():
+        service = VectorService()
+        service.loaded = True
+        _populate(service, corpus)
+        service.rebuild_vectors()
+        budget_ms = service.retrieval_budget_ms
+        doc_ids = list(service.documents.keys())
+
+        for label, questions in (("exact", labeled), ("paraphrase", paraphrased)):
+            # Previous single-argmax path: TF-IDF cosine over every document
+            baseline_rankings, baseline_samples = [], []
+            for item in questions:
+                start = time.perf_counter()
+                similarities = cosine_similarity(service.vectorizer.transform([item["question"]]), service.vectors).flatten()
+                top = similarities.argsort()[::-1][:max(RECALL_KS)]
+                baseline_samples.append(time.perf_counter() - start)
+                baseline_rankings.append([doc_ids[i] for i in top if similarities[i] >= 0.1])
+
+            hybrid_rankings, hybrid_samples = [], []
+            for item in questions:
+                start = time.perf_counter()
+                hits = service.search(item["question"], k=max(RECALL_KS))
+                hybrid_samples.append(time.perf_counter() - start)
+                hybrid_rankings.append([hit["content_id"] for hit in hits])
+
+            results[f"retrieval.tfidf_cosine.{label}.{num_docs}"] = summarize(
+                baseline_samples, docs=num_docs, questions=len(questions), **_recall(baseline_rankings, questions)
+            )
+            results[f"retrieval.hybrid.{label}.{num_docs}"] = summarize(
+                hybrid_samples, docs=num_docs, questions=len(questions), budget_ms=budget_ms, budget_stat="p95_ms",
+                **_recall(hybrid_rankings, questions)
+            )
+    return results
@@ -0,0 +1,105 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from benchmarks.bench_api import _load, auth_headers, load_app
+from benchmarks.common import scratch_dir, summarize
+from benchmarks.generators import make_corpus
+
+# Transcript length for the indexed library (a ~5 minute lecture)
+WORDS_PER_DOC = 600
+
+def _queries(corpus, rng: random.Random) -> Dict[str, list]:
+    """Term, prefix and phrase queries drawn from the corpus, so every kind has hits."""
+    words = [transcript.split() for _, transcript, _ in rng.sample(corpus, 50)]
+    terms = [rng.choice(tokens).strip(".,").lower() for tokens in words]
+    phrases = []
+    for tokens in words:
+        start = rng.randrange(len(tokens) - 3)
+        phrases.append('"' + " ".join(token.strip(".,") for token in tokens[start:start + 3]) + '"')
+    return {
+        "term": terms,
+        "two_terms": [f"{a} {b}" for a, b in zip(terms, reversed(terms))],
+        "prefix": [f"{term[:3]}*" for term in terms if len(term) >= 3],
+        "phrase": phrases,
+        "common_phrase": ['"of the"'] * 20,
+    }
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    from services.search_index import SearchIndex, build_snippets, match_offsets
+
+    num_docs = 2_000 if quick else 10_000
+    corpus = make_corpus(num_docs, words_per_doc=WORDS_PER_DOC, seed=num_docs)
+    results = {}
+
+    with scratch_dir():
+        # Incremental ingest: one document per upload, with segment merges and a save each time
+        index = SearchIndex("search_index")
+        samples = []
+        for i, (content_id, transcript, _) in enumerate(corpus):
+            start = time.perf_counter()
+            index.add_document("bench", content_id, f"Lecture {i}", transcript)
+            samples.append(time.perf_counter() - start)
+        results[f"search.add.{num_docs}"] = summarize(
+            samples, docs=num_docs, words_per_doc=WORDS_PER_DOC,
+            worst_ms=round(max(samples) * 1000, 3), **index.stats("bench")
+        )
+
+        # Cold start: a fresh process loading the segments from disk
+        start = time.perf_counter()
+        cold = SearchIndex("search_index")
+        cold.search("bench", "lecture")
+        results[f"search.cold_load.{num_docs}"] = summarize([time.perf_counter() - start], docs=num_docs)
+
+        texts = {content_id: transcript for content_id, transcript, _ in corpus}
+        for kind, queries in _queries(corpus, random.Random(1)).items():
+            samples, totals = [], []
+            for query in queries:
+                start = time.perf_counter()
+                total, hits = index.search("bench", query, limit=10)
+                for hit in hits:
+                    build_snippets(texts[hit.content_id], hit.matches)
+                    match_offsets(texts[hit.content_id], hit.matches)
+                samples.append(time.perf_counter() - start)
+                totals.append(total)
+            results[f"search.query.{kind}.{num_docs}"] = summarize(
+                samples, docs=num_docs, median_hits=sorted(totals)[len(totals) // 2]
+            )
+
+    # Through the API: backfill of content stored before the index, then paginated queries
+    api_docs = 500 if quick else 2_000
+    total = 50 if quick else 400
+    concurrency = 10 if quick else 50
+    with scratch_dir():
+        main, db = load_app()
+
+        async def scenario():
+            headers = await auth_headers(db)
+            user_id = str(db.users.documents[0]["_id"])
+            await db.content.insert_many([
+                {"_id": content_id, "user_id": user_id, "title": f"Lecture {i}", "content_type": "upload",
+                 "transcript": transcript, "summary": summary, "created_at": datetime.utcnow(), "language": "en"}
+                for i, (content_id, transcript, summary) in enumerate(corpus[:api_docs])
+            ])
+            queries = [query for queries in _queries(corpus[:api_docs], random.Random(2)).values()
+                       for query in queries]
+
+            import httpx
+            results = {}
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60) as client:
+                start = time.perf_counter()
+                response = await client.get("/api/search", params={"q": "lecture"})
+                results[f"api.search_backfill.{api_docs}"] = summarize(
+                    [time.perf_counter() - start], docs=api_docs, statuses={response.status_code: 1}
+                )
+                results["api.search"] = await _load(
+                    client, "GET", "/api/search", concurrency, total,
+                    params=lambda i: {"q": queries[i % len(queries)], "page": 1 + i % 3, "page_size": 10},
+                )
+            return results
+
+        results.update(asyncio.run(scenario()))
+    return results
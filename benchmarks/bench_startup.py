@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict
+
+from benchmarks.bench_api import _prepare_static_dirs
+from benchmarks.common import BACKEND_DIR, scratch_dir, summarize
+
+# Cold `import main` budget for a worker, in milliseconds
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+HEAVY_MODULES = ("sklearn", "scipy", "nltk", "torch", "sentence_transformers", "faiss")
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    samples = []
+    heavy = set()
+    probe = _PROBE.format(backend=BACKEND_DIR, heavy=HEAVY_MODULES)
+    with scratch_dir():
+        _prepare_static_dirs()
+        for _ in range(3 if quick else 7):
+            output = subprocess.run(
+                [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(output)
+            samples.append(result["seconds"])
+            heavy.update(result["heavy"])
+
+    stats = summarize(samples, budget_ms=IMPORT_BUDGET_MS, heavy_modules_loaded=sorted(heavy))
+    return {"startup.import_main": stats}
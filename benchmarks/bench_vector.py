@@ -0,0 +1,57 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+from benchmarks.common import measure, scratch_dir, summarize
+from benchmarks.generators import make_corpus, make_questions
+
+# Index sizes (documents)
+DOC_COUNTS = (100, 1_000, 10_000, 100_000)
+QUICK_DOC_COUNTS = (100, 1_000)
+
+def _populate(service, corpus):
+    for content_id, transcript, summary in corpus:
+        service.documents[content_id] = {
+            'transcript': transcript,
+            'summary': summary,
+            'combined_text': f"{summary}\n\n{transcript}",
+            'user_id': None
+        }
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    from services.vector_service import VectorService
+
+    results = {}
+    questions = make_questions(50, seed=3)
+    for num_docs in (QUICK_DOC_COUNTS if quick else DOC_COUNTS):
+        corpus = make_corpus(num_docs + 1, seed=num_docs)
+        extra_id, extra_transcript, extra_summary = corpus.pop()
+        heavy = num_docs >= 10_000
+
+        with scratch_dir():
+            service = VectorService()
+            _populate(service, corpus)
+
+            results[f"vector.rebuild_vectors.{num_docs}"] = measure(
+                service.rebuild_vectors, repeat=1 if heavy else 3, warmup=0, docs=num_docs
+            )
+
+            # One ingest at this size: full refit plus persistence
+            start = time.perf_counter()
+            asyncio.run(service.store_content(extra_id, extra_transcript, extra_summary))
+            results[f"vector.store_content.{num_docs}"] = summarize([time.perf_counter() - start], docs=num_docs)
+
+            async def cold_queries():
+                samples = []
+                for question in questions:
+                    service.cache.clear()
+                    start = time.perf_counter()
+                    await service.query(question)
+                    samples.append(time.perf_counter() - start)
+                return samples
+
+            results[f"vector.query.{num_docs}"] = summarize(asyncio.run(cold_queries()), docs=num_docs)
+            results[f"vector.query_cached.{num_docs}"] = measure(
+                lambda: service.query(questions[0]), repeat=20, docs=num_docs
+            )
+    return results
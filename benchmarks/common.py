@@ -0,0 +1,59 @@
+import asyncio
+import inspect
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+# Backend modules use flat imports (``from services...``), as when run from backend/
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+def summarize(samples: List[float], **extra: Any) -> Dict[str, Any]:
+    """Summarize timing samples (seconds) in milliseconds."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    result = {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "p95_ms": round(ordered[p95_index] * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+    }
+    result.update(extra)
+    return result
+
+def measure(func: Callable, repeat: int = 5, warmup: int = 1, **extra: Any) -> Dict[str, Any]:
+    """Time a sync or async callable ``repeat`` times after ``warmup`` runs."""
+    def call():
+        result = func()
+        if inspect.isawaitable(result):
+            asyncio.run(_await(result))
+
+    for _ in range(warmup):
+        call()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, **extra)
+
+async def _await(awaitable):
+    return await awaitable
+
+@contextmanager
+def scratch_dir():
+    """Run inside a temporary working directory (services write relative paths)."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="smartscribe-bench-") as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(previous)
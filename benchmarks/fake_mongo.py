@@ -0,0 +1,110 @@
+import copy
+import itertools
+from typing import Any, Dict, List
+
+_ids = itertools.count(1)
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, expected in query.items():
+        value = document.get(key)
+        if isinstance(expected, dict) and any(k.startswith("$") for k in expected):
+            if "$in" in expected and value not in expected["$in"]:
+                return False
+            if "$exists" in expected and (key in document) != expected["$exists"]:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+class FakeCursor:
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self._documents = documents
+        self._index = 0
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._index >= len(self._documents):
+            raise StopAsyncIteration
+        self._index += 1
+        return copy.copy(self._documents[self._index - 1])
+
+    async def to_list(self, length=None):
+        return [copy.copy(doc) for doc in self._documents[:length]]
+
+class FakeCollection:
+    """Minimal in-memory stand-in for a Motor collection."""
+
+    def __init__(self, object_ids: bool = False):
+        self.documents: List[Dict[str, Any]] = []
+        self.object_ids = object_ids
+
+    def _insert(self, document):
+        if self.object_ids:
+            from bson import ObjectId
+            # As pymongo assigns them, so string-id lookups don't silently match
+            document.setdefault("_id", ObjectId())
+        document.setdefault("_id", f"{next(_ids):024x}")
+        self.documents.append(copy.copy(document))
+        return document["_id"]
+
+    async def insert_one(self, document):
+        return InsertOneResult(self._insert(document))
+
+    async def insert_many(self, documents, ordered=True):
+        return InsertManyResult([self._insert(doc) for doc in documents])
+
+    async def find_one(self, query=None, projection=None):
+        for document in self.documents:
+            if _matches(document, query or {}):
+                return copy.copy(document)
+        return None
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([doc for doc in self.documents if _matches(doc, query or {})])
+
+    async def count_documents(self, query):
+        return sum(1 for doc in self.documents if _matches(doc, query))
+
+    async def update_one(self, query, update, upsert=False):
+        for document in self.documents:
+            if _matches(document, query):
+                document.update(update.get("$set", {}))
+                return
+        if upsert:
+            self._insert({**query, **update.get("$set", {})})
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+class FakeDatabase:
+    def __init__(self, object_ids: bool = False):
+        self._collections: Dict[str, FakeCollection] = {}
+        self.object_ids = object_ids
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self.object_ids)
+        return self._collections[name]
@@ -0,0 +1,82 @@
+import random
+from typing import Dict, List, Tuple
+
+# Transcript sizes in words
+SIZES = {
+    "small": 300,
+    "medium": 3000,
+    "large": 30000,
+}
+
+TOPICS = [
+    "photosynthesis", "mitochondria", "recursion", "inflation", "entropy", "democracy",
+    "algorithm", "osmosis", "gravity", "metabolism", "encryption", "supply", "demand",
+    "vaccination", "erosion", "neuron", "polymer", "catalyst", "derivative", "integral",
+    "sonnet", "feudalism", "plate", "tectonics", "enzyme", "compiler", "bandwidth",
+    "genome", "monopoly", "allele", "velocity", "momentum", "isotope", "ecosystem",
+]
+
+FILLER = [
+    "the", "lecture", "explains", "how", "students", "should", "consider", "important",
+    "process", "structure", "example", "system", "energy", "model", "result", "change",
+    "data", "theory", "method", "function", "value", "important", "different", "between",
+    "within", "because", "therefore", "however", "specific", "general", "common", "basic",
+]
+
+TEMPLATES = [
+    "{a} is defined as a {f1} {f2} that {f3} the {b}.",
+    "In this lecture we see that {a} refers to the {f1} of {b} and {f2}.",
+    "A common example of {a} is the {f1} {b} which {f2} over time.",
+    "Remember that {a} and {b} are closely related through {f1} {f2}.",
+    "The {f1} {f2} of {a} include {b}, {f3} and several other factors.",
+    "So {a} means that the {f1} {b} will {f2} the whole {f3}.",
+]
+
+def make_sentence(rng: random.Random, topics: List[str]) -> str:
+    template = rng.choice(TEMPLATES)
+    return template.format(
+        a=rng.choice(topics),
+        b=rng.choice(topics),
+        f1=rng.choice(FILLER),
+        f2=rng.choice(FILLER),
+        f3=rng.choice(FILLER),
+    ).capitalize()
+
+def make_transcript(num_words: int, seed: int = 0, topics: List[str] = None) -> str:
+    """Generate a deterministic lecture-like transcript of roughly ``num_words`` words."""
+    rng = random.Random(seed)
+    topics = topics or rng.sample(TOPICS, 4)
+    sentences = []
+    words = 0
+    while words < num_words:
+        sentence = make_sentence(rng, topics)
+        sentences.append(sentence)
+        words += len(sentence.split())
+    return " ".join(sentences)
+
+def make_corpus(num_docs: int, words_per_doc: int = 80, seed: int = 0) -> List[Tuple[str, str, str]]:
+    """Generate (content_id, transcript, summary) triples for index benchmarks."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(num_docs):
+        topics = rng.sample(TOPICS, 3)
+        transcript = make_transcript(words_per_doc, seed=seed * 1_000_003 + i, topics=topics)
+        summary = transcript.split(". ")[0] + "."
+        corpus.append((f"doc-{i}", transcript, summary))
+    return corpus
+
+def make_questions(num_questions: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [f"What is {rng.choice(TOPICS)}?" for _ in range(num_questions)]
+
+def make_labeled_qa(corpus: List[Tuple[str, str, str]], per_doc: int = 1, seed: int = 0) -> List[Dict[str, str]]:
+    """Build questions whose answer lives in a known document (for recall@k)."""
+    rng = random.Random(seed)
+    labeled = []
+    for content_id, transcript, _ in corpus:
+        sentences = [s for s in transcript.split(". ") if len(s.split()) > 6]
+        for sentence in rng.sample(sentences, min(per_doc, len(sentences))):
+            words = sentence.rstrip(".").split()
+            start = rng.randrange(0, max(1, len(words) - 6))
+            labeled.append({"question": " ".join(words[start:start + 6]) + "?", "content_id": content_id})
+    return labeled
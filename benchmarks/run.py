@@ -0,0 +1,133 @@
+"""Run the SmartScribe benchmark suite.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --quick --suite nlp,vector
+    python -m benchmarks.run --baseline baseline.json --threshold 0.25
+
+With ``--baseline`` the run exits non-zero when any benchmark's median is
+more than ``threshold`` slower than in the baseline file. Benchmarks that
+declare a ``budget_ms`` also fail the run when their median (or the stat
+named by ``budget_stat``) exceeds it.
+"""
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+SUITES = {
+    "nlp": "benchmarks.bench_nlp",
+    "quiz": "benchmarks.bench_quiz",
+    "vector": "benchmarks.bench_vector",
+    "retrieval": "benchmarks.bench_retrieval",
+    "api": "benchmarks.bench_api",
+    "payload": "benchmarks.bench_payload",
+    "admission": "benchmarks.bench_admission",
+    "dedup": "benchmarks.bench_dedup",
+    "ingest": "benchmarks.bench_ingest",
+    "quantization": "benchmarks.bench_quantization",
+    "search": "benchmarks.bench_search",
+    "startup": "benchmarks.bench_startup",
+}
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def run_suites(names: List[str], quick: bool) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        print(f"== {name}", flush=True)
+        module = importlib.import_module(SUITES[name])
+        for bench, stats in module.run(quick=quick).items():
+            print(f"  {bench:<40} median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms", flush=True)
+            results[bench] = stats
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """List benchmarks whose median grew by more than ``threshold`` (a fraction)."""
+    regressions = []
+    for name, stats in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("median_ms"):
+            continue
+        ratio = stats["median_ms"] / previous["median_ms"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{name}: {previous['median_ms']:.3f} ms -> {stats['median_ms']:.3f} ms (+{(ratio - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+def find_budget_violations(current: Dict[str, Any]) -> List[str]:
+    """List benchmarks whose ``budget_stat`` (median by default) exceeds their ``budget_ms``."""
+    violations = []
+    for name, stats in current["results"].items():
+        if stats.get("budget_ms") is None:
+            continue
+        stat = stats.get("budget_stat", "median_ms")
+        if stats[stat] > stats["budget_ms"]:
+            violations.append(f"{name}: {stat} {stats[stat]:.3f} ms > budget {stats['budget_ms']:.3f} ms")
+    return violations
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run SmartScribe benchmarks")
+    parser.add_argument("--suite", default=",".join(SUITES), help="comma-separated suites: " + ", ".join(SUITES))
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast smoke run")
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median slowdown (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.suite.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    report = run_suites(names, args.quick)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    status = 0
+    violations = find_budget_violations(report)
+    if violations:
+        print("Budget violations:")
+        for line in violations:
+            print(f"  {line}")
+        status = 1
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions over {args.threshold * 100:.0f}%:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline.")
+
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
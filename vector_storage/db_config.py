@@ -1,4 +1,3 @@
-import faiss
 import numpy as np
 import os
 
@@ -6,14 +5,17 @@ INDEX_FILE = os.path.join(os.path.dirname(__file__), "faiss_index.bin")
 DOCS_FILE = os.path.join(os.path.dirname(__file__), "documents.npy")
 
 def create_index(dimension=384):
+    import faiss
     return faiss.IndexFlatL2(dimension)
 
 def save_index(index, documents):
+    import faiss
     faiss.write_index(index, INDEX_FILE)
     np.save(DOCS_FILE, documents)
 
 def load_index():
     if os.path.exists(INDEX_FILE) and os.path.exists(DOCS_FILE):
+        import faiss
         index = faiss.read_index(INDEX_FILE)
         documents = np.load(DOCS_FILE, allow_pickle=True)
         return index, documents
@@ -1,8 +1,22 @@
-from sentence_transformers import SentenceTransformer
+import numpy as np
 
-# Load lightweight model (fast and free)
-model = SentenceTransformer("all-MiniLM-L6-v2")
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Lightweight model (fast and free), loaded on first use so importing this
+# module doesn't pull in torch
+_model = None
+
+def get_model():
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(MODEL_NAME)
+    return _model
 
 def get_embedding(text: str):
     """Convert text to vector embedding"""
-    return model.encode([text])[0]
+    return get_model().encode([text])[0]
+
+def embed_text(texts):
+    """Convert a list of texts to a float32 embedding matrix"""
+    return np.asarray(get_model().encode(list(texts)), dtype=np.float32)